@@ -11,27 +11,57 @@ https://github.com/Limych/ha-jq300
 import asyncio
 from datetime import timedelta
 import logging
+from typing import Callable, Dict, List, Optional
 
 import async_timeout
 import voluptuous as vol
 
 from homeassistant.config_entries import SOURCE_IMPORT, ConfigEntry
-from homeassistant.const import CONF_DEVICES, CONF_PASSWORD, CONF_USERNAME
-from homeassistant.core import HomeAssistant
+from homeassistant.const import (
+    CONF_DEVICES,
+    CONF_ENTITY_ID,
+    CONF_NAME,
+    CONF_PASSWORD,
+    CONF_USERNAME,
+    EVENT_HOMEASSISTANT_STOP,
+)
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.dispatcher import (
+    async_dispatcher_connect,
+    async_dispatcher_send,
+)
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.typing import ConfigType
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import slugify
 
-from .api import Jq300Account
+from .api import Jq300Account, SensorsDictType
 from .const import (
     CONF_ACCOUNT_CONTROLLER,
+    CONF_COORDINATOR,
+    CONF_DEADBAND,
+    CONF_DEADBAND_PERCENT,
+    CONF_HEARTBEAT,
+    CONF_MIN_INTERVAL,
+    CONF_PUBLISH,
     CONF_RECEIVE_HCHO_IN_PPB,
     CONF_RECEIVE_TVOC_IN_PPB,
     CONF_YAML,
+    DATA_RELOADING,
+    DISCOVERY_INTERVAL,
     DOMAIN,
     PLATFORMS,
+    SENSORS,
+    SIGNAL_NEW_DEVICES,
+    SIGNAL_UPDATE_DEVICE,
     STARTUP_MESSAGE,
+    STORAGE_KEY,
+    STORAGE_VERSION,
     UPDATE_TIMEOUT,
 )
 from .util import mask_email
@@ -42,6 +72,20 @@ _LOGGER = logging.getLogger(__name__)
 SCAN_INTERVAL = timedelta(seconds=30)
 
 
+SENSORS_KEYS = {
+    slugify(data.get(CONF_ENTITY_ID, data[CONF_NAME])): sensor_id
+    for sensor_id, data in SENSORS.items()
+}
+
+PUBLISH_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_DEADBAND): cv.positive_float,
+        vol.Optional(CONF_DEADBAND_PERCENT): cv.positive_float,
+        vol.Optional(CONF_MIN_INTERVAL): cv.positive_int,
+        vol.Optional(CONF_HEARTBEAT): cv.positive_int,
+    }
+)
+
 ACCOUNT_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_USERNAME): cv.string,
@@ -49,10 +93,13 @@ ACCOUNT_SCHEMA = vol.Schema(
         vol.Optional(CONF_DEVICES): vol.All(cv.ensure_list, [cv.string]),
         vol.Optional(CONF_RECEIVE_TVOC_IN_PPB, default=False): cv.boolean,
         vol.Optional(CONF_RECEIVE_HCHO_IN_PPB, default=False): cv.boolean,
+        vol.Optional(CONF_PUBLISH, default={}): {vol.In(SENSORS_KEYS): PUBLISH_SCHEMA},
     }
 )
 
-CONFIG_SCHEMA = vol.Schema({DOMAIN: ACCOUNT_SCHEMA}, extra=vol.ALLOW_EXTRA)
+CONFIG_SCHEMA = vol.Schema(
+    {DOMAIN: vol.All(cv.ensure_list, [ACCOUNT_SCHEMA])}, extra=vol.ALLOW_EXTRA
+)
 
 
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
@@ -65,12 +112,17 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     if DOMAIN not in config:
         return True
 
-    hass.data[DOMAIN][CONF_YAML] = config[DOMAIN]
-    hass.async_create_task(
-        hass.config_entries.flow.async_init(
-            DOMAIN, context={"source": SOURCE_IMPORT}, data={}
+    hass.data[DOMAIN][CONF_YAML] = {}
+    for account_config in config[DOMAIN]:
+        username = account_config[CONF_USERNAME]
+        hass.data[DOMAIN][CONF_YAML][username] = account_config
+        hass.async_create_task(
+            hass.config_entries.flow.async_init(
+                DOMAIN,
+                context={"source": SOURCE_IMPORT},
+                data={CONF_USERNAME: username},
+            )
         )
-    )
 
     return True
 
@@ -78,7 +130,20 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up this integration using UI."""
     if entry.source == SOURCE_IMPORT:
-        config = hass.data[DOMAIN][CONF_YAML]
+        accounts = hass.data[DOMAIN].get(CONF_YAML, {})
+        username = entry.data.get(CONF_USERNAME)
+        if username is None and accounts:
+            # Entry is created by previous version for single account
+            username = next(iter(accounts))
+            hass.config_entries.async_update_entry(
+                entry, data={CONF_USERNAME: username}, unique_id=username
+            )
+        if username not in accounts:
+            _LOGGER.info("Account is removed from configuration.yaml")
+            hass.async_create_task(hass.config_entries.async_remove(entry.entry_id))
+            return False
+
+        config = accounts[username]
     else:
         config = entry.data.copy()
         config.update(entry.options)
@@ -86,37 +151,93 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     username = config.get(CONF_USERNAME)
     password = config.get(CONF_PASSWORD)
     active_devices = config.get(CONF_DEVICES, [])
-    receive_tvoc_in_ppb = config.get(CONF_RECEIVE_TVOC_IN_PPB)
-    receive_hcho_in_ppb = config.get(CONF_RECEIVE_HCHO_IN_PPB)
-
-    _LOGGER.debug("Connecting to account %s", mask_email(username))
+    receive_tvoc_in_ppb = config.get(CONF_RECEIVE_TVOC_IN_PPB, False)
+    receive_hcho_in_ppb = config.get(CONF_RECEIVE_HCHO_IN_PPB, False)
+
+    # Controller which is kept alive while entry is reloading
+    reloading = hass.data.setdefault(DOMAIN, {}).get(DATA_RELOADING, {})
+    account = reloading.pop(entry.entry_id, None)
+    if account is not None and not account.is_same_account(username, password):
+        await account.async_stop()
+        account = None
+
+    if account is not None:
+        _LOGGER.debug("Reuse connection to account %s", mask_email(username))
+        account.async_reconfigure(receive_tvoc_in_ppb, receive_hcho_in_ppb)
+    else:
+        _LOGGER.debug("Connecting to account %s", mask_email(username))
+
+        session = async_get_clientsession(hass)
+        account = Jq300Account(
+            hass,
+            session,
+            username,
+            password,
+            receive_tvoc_in_ppb,
+            receive_hcho_in_ppb,
+            store=Store(hass, STORAGE_VERSION, STORAGE_KEY.format(entry.entry_id)),
+        )
 
-    session = async_get_clientsession(hass)
-    account = Jq300Account(
-        hass, session, username, password, receive_tvoc_in_ppb, receive_hcho_in_ppb
+    # Devices known from live connection or cache do not need to wait for data
+    known_devices = True
+    if account.devices:
+        devices = account.devices
+    elif await account.async_load_cache():
+        devices = account.devices
+        # Revalidation must not outlive the entry
+        entry.async_on_unload(
+            hass.async_create_task(account.async_revalidate_cache()).cancel
+        )
+    else:
+        known_devices = False
+        try:
+            async with async_timeout.timeout(UPDATE_TIMEOUT):
+                devices = await account.async_update_devices()
+        except asyncio.TimeoutError:
+            devices = None
+
+    if devices is None:
+        # Connection is made again on next setup attempt
+        await account.async_stop()
+        raise ConfigEntryNotReady
+
+    devs = _get_active_devices(devices, active_devices)
+    account.active_devices = list(devs.values())
+
+    async def _async_stop(_event) -> None:
+        """Stop controller on Home Assistant shutdown."""
+        await account.async_stop()
+
+    entry.async_on_unload(
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_stop)
     )
 
-    try:
-        async with async_timeout.timeout(UPDATE_TIMEOUT):
-            devices = await account.async_update_devices()
-    except asyncio.TimeoutError as exc:
-        raise ConfigEntryNotReady from exc
-
-    devs = {}
-    adevs = []
-    for device_id in devices:
-        name = devices[device_id]["pt_name"]
-        if active_devices and name not in active_devices:
-            continue
-
-        adevs.append(device_id)
-        devs[name] = device_id
-
-    account.active_devices = adevs
+    coordinator = Jq300DataUpdateCoordinator(hass, account)
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass,
+            SIGNAL_UPDATE_DEVICE.format(account.unique_id),
+            coordinator.async_handle_device_update,
+        )
+    )
+    if known_devices:
+        # Restored states of entities cover the gap until first data
+        hass.async_create_task(coordinator.async_refresh())
+    else:
+        try:
+            await coordinator.async_config_entry_first_refresh()
+        except ConfigEntryNotReady:
+            await account.async_stop()
+            raise
 
     hass.data[DOMAIN][entry.entry_id] = {
         CONF_ACCOUNT_CONTROLLER: account,
+        CONF_COORDINATOR: coordinator,
         CONF_DEVICES: devs,
+        CONF_PUBLISH: {
+            SENSORS_KEYS[key]: options
+            for key, options in config.get(CONF_PUBLISH, {}).items()
+        },
     }
 
     # Load platforms
@@ -125,49 +246,159 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             hass.config_entries.async_forward_entry_setup(entry, platform)
         )
 
-    entry.add_update_listener(async_reload_entry)
+    async def _async_discover_devices(_now=None) -> None:
+        """Add new and retire removed devices of account."""
+        known = set(account.devices)
+        devices = await account.async_update_devices(force=True)
+        if devices is None or set(devices) == known:
+            return
+
+        data = hass.data[DOMAIN][entry.entry_id]
+        devs = _get_active_devices(devices, active_devices)
+        new_devs = {
+            name: dev_id for name, dev_id in devs.items() if dev_id not in known
+        }
+        removed = known - set(devices)
+        _LOGGER.debug(
+            "Devices of account %s changed: %d added, %d removed",
+            account.name_secure,
+            len(new_devs),
+            len(removed),
+        )
+
+        account.active_devices = list(devs.values())
+        data[CONF_DEVICES] = devs
+
+        device_registry = dr.async_get(hass)
+        for device_id in removed:
+            device = device_registry.async_get_device(
+                {(DOMAIN, account.unique_id, device_id)}
+            )
+            if device is not None:
+                device_registry.async_update_device(
+                    device.id, remove_config_entry_id=entry.entry_id
+                )
+
+        if new_devs:
+            async_dispatcher_send(
+                hass, SIGNAL_NEW_DEVICES.format(entry.entry_id), new_devs
+            )
+            await coordinator.async_request_refresh()
+
+    entry.async_on_unload(
+        async_track_time_interval(hass, _async_discover_devices, DISCOVERY_INTERVAL)
+    )
+
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
     return True
 
 
-# class Jq300DataUpdateCoordinator(DataUpdateCoordinator):
-#     """Class to manage fetching data from the API."""
-#
-#     def __init__(
-#         self, hass: HomeAssistant, client: JqApiClient
-#     ) -> None:
-#         """Initialize."""
-#         self.api = client
-#         self.platforms = []
-#
-#         super().__init__(hass, _LOGGER, name=DOMAIN, update_interval=SCAN_INTERVAL)
-#
-#     async def _async_update_data(self):
-#         """Update data via library."""
-#         try:
-#             return await self.api.async_get_data()
-#         except Exception as exception:
-#             raise UpdateFailed() from exception
+def _get_active_devices(
+    devices: Dict[int, dict], active_devices: List[str]
+) -> Dict[str, int]:
+    """Get IDs of devices to add to Home Assistant by their names."""
+    devs = {}
+    for device_id, device in devices.items():
+        name = device["pt_name"]
+        if active_devices and name not in active_devices:
+            continue
+
+        devs[name] = device_id
+    return devs
+
+
+class Jq300DataUpdateCoordinator(
+    DataUpdateCoordinator[Dict[int, Optional[SensorsDictType]]]
+):
+    """Class to manage averaged sensors data of all active devices of account."""
+
+    def __init__(self, hass: HomeAssistant, account: Jq300Account) -> None:
+        """Initialize."""
+        self.account = account
+        self._device_listeners: Dict[int, List[CALLBACK_TYPE]] = {}
+
+        super().__init__(hass, _LOGGER, name=DOMAIN, update_interval=SCAN_INTERVAL)
+
+    async def _async_update_data(self) -> Dict[int, Optional[SensorsDictType]]:
+        """Update data via library."""
+        # Devices are polled with their own timeouts, so a hanging device
+        # fails alone. Only stale devices are polled, so failed poll fails
+        # refresh only if no active device has data at all
+        updated = await self.account.async_update_sensors_or_timeout(None)
+
+        data = {
+            device_id: self.account.get_sensors(device_id)
+            for device_id in self.account.active_devices
+        }
+        if not updated and all(sensors is None for sensors in data.values()):
+            raise UpdateFailed("Error fetching sensors of all devices")
+
+        return data
+
+    @callback
+    def async_add_device_listener(
+        self, device_id, update_callback: CALLBACK_TYPE
+    ) -> Callable[[], None]:
+        """Listen for new frames of one device."""
+        listeners = self._device_listeners.setdefault(device_id, [])
+        listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            """Remove device listener."""
+            listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def async_handle_device_update(self, device_id) -> None:
+        """Update data of device when new frame received for it."""
+        if self.data is None:
+            self.data = {}
+        self.data[device_id] = self.account.get_sensors(device_id)
+
+        # Do not reschedule periodic refresh: it's still needed by other devices.
+        # Only entities of this device are notified
+        for update_callback in list(self._device_listeners.get(device_id, [])):
+            update_callback()
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Handle removal of an entry."""
-    # coordinator = hass.data[DOMAIN][entry.entry_id]
     unloaded = all(
         await asyncio.gather(
             *[
                 hass.config_entries.async_forward_entry_unload(entry, platform)
                 for platform in PLATFORMS
-                # if platform in coordinator.platforms
             ]
         )
     )
     if unloaded:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        account = hass.data[DOMAIN].pop(entry.entry_id)[CONF_ACCOUNT_CONTROLLER]
+        reloading = hass.data[DOMAIN].get(DATA_RELOADING)
+        if reloading is not None and entry.entry_id in reloading:
+            # Keep connection to cloud for reloaded entry
+            reloading[entry.entry_id] = account
+        else:
+            await account.async_stop()
 
     return unloaded
 
 
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    """Reload config entry."""
-    await async_unload_entry(hass, entry)
-    await async_setup_entry(hass, entry)
+    """Reload config entry reusing live connection to cloud."""
+    reloading = hass.data[DOMAIN].setdefault(DATA_RELOADING, {})
+    reloading[entry.entry_id] = None
+    try:
+        await hass.config_entries.async_reload(entry.entry_id)
+    finally:
+        account = reloading.pop(entry.entry_id, None)
+        if account is not None:
+            # Entry is not set up again
+            await account.async_stop()
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove cache of removed entry. It holds account credentials."""
+    store = Store(hass, STORAGE_VERSION, STORAGE_KEY.format(entry.entry_id))
+    await store.async_remove()
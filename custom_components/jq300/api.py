@@ -9,40 +9,61 @@ https://github.com/Limych/ha-jq300
 #  (see LICENSE.md or https://creativecommons.org/licenses/by-nc-sa/4.0/)
 
 import asyncio
+from copy import deepcopy
 from datetime import timedelta
+from functools import partial
 from http import HTTPStatus
 import json
 import logging
-from time import monotonic
-from typing import Any, Dict, List, Optional, Union
-from urllib.parse import urlparse
+from time import monotonic, perf_counter
+from typing import Any, Dict, List, Optional, Tuple, Union
 
-from aiohttp import ClientSession
+from aiohttp import ClientError, ClientSession
 import async_timeout
-import paho.mqtt.client as mqtt
-from requests import PreparedRequest
+from yarl import URL
 
 from homeassistant.const import (
-    CONCENTRATION_MILLIGRAMS_PER_CUBIC_METER,
     CONCENTRATION_PARTS_PER_BILLION,
     CONCENTRATION_PARTS_PER_MILLION,
     CONF_UNIT_OF_MEASUREMENT,
 )
-from homeassistant.core import HomeAssistant
-from homeassistant.util import Throttle
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
 import homeassistant.util.dt as dt_util
 
+from .averager import SensorsAverager
+from .breaker import CircuitBreaker, backoff_delay
 from .const import (
     AVAILABLE_TIMEOUT,
     BINARY_SENSORS,
     CONF_PRECISION,
-    MWEIGTH_HCHO,
-    MWEIGTH_TVOC,
+    DEVICE_POLL_INTERVAL,
+    DEVICE_POLL_MIN_INTERVAL,
+    DEVICE_STALE_TIMEOUT,
+    MAX_CONCURRENT_QUERIES,
+    METRIC_DECODE_TIME,
+    METRIC_DROPPED_FRAMES,
+    METRIC_LAST_FRAME_AGE,
+    METRIC_MESSAGES_RATE,
+    METRIC_QUERY_LATENCY,
+    METRIC_RECONNECTS,
+    MODEL_DEFAULT_SENSORS,
+    MODELS,
+    QUERY_RETRIES,
+    QUERY_TIME_BUDGET,
     QUERY_TIMEOUT,
     SENSORS,
-    SENSORS_FILTER_FRAME,
+    SIGNAL_UPDATE_AVAILABILITY,
+    SIGNAL_UPDATE_DEVICE,
+    STORAGE_SAVE_DELAY,
     UPDATE_TIMEOUT,
 )
+from .decoder import SensorsDecoder
+from .ingest import Jq300IngestQueue
+from .metrics import Jq300Metrics
+from .rollup import SensorsRollup
 from .util import mask_email
 
 _LOGGER = logging.getLogger(__name__)
@@ -77,6 +98,10 @@ class ApiError(Exception):
     """Raised when API request ended in error."""
 
 
+class ApiTemporaryError(ApiError):
+    """Raised when API request failed, but it can be retried later."""
+
+
 # pylint: disable=too-many-instance-attributes
 class Jq300Account:
     """JQ-300 cloud account controller."""
@@ -90,6 +115,8 @@ class Jq300Account:
         password,
         receive_tvoc_in_ppb=False,
         receive_hcho_in_ppb=False,
+        max_concurrent_queries=MAX_CONCURRENT_QUERIES,
+        store: Optional[Store] = None,
     ):
         """Initialize configured controller."""
         self.params = {
@@ -103,25 +130,69 @@ class Jq300Account:
         self._password = password
         self._receive_tvoc_in_ppb = receive_tvoc_in_ppb
         self._receive_hcho_in_ppb = receive_hcho_in_ppb
+        self._store = store
 
         self._mqtt = None
+        self._unsub_mqtt_reconnect: Optional[CALLBACK_TYPE] = None
+        self._ingest = Jq300IngestQueue(hass, self._mqtt_process_batch)
         self._active_devices = []
         self._devices = {}
-        self._sensors = {}
+        self._device_tokens: Dict[str, int] = {}
+        self._sensors: Dict[int, SensorsAverager] = {}
         self._sensors_raw = {}
+        self._rollups: Dict[int, SensorsRollup] = {}
+        self._decoders: Dict[Optional[str], SensorsDecoder] = {}
+        self._device_decoders: Dict[int, SensorsDecoder] = {}
+        self._sensors_polled: Dict[int, float] = {}
+        self._poll_intervals: Dict[int, float] = {}
+        self._connected = False
+        self._available: Dict[int, bool] = {}
+        self._unsub_expire: Dict[int, CALLBACK_TYPE] = {}
         self._units = {}
+        self._queries_semaphore = asyncio.Semaphore(max_concurrent_queries)
+        self._queries_inflight: Dict[str, asyncio.Future] = {}
+        self._breaker = CircuitBreaker()
+        self.metrics = Jq300Metrics()
+
+        self._set_units()
 
-        for sensor_id, data in BINARY_SENSORS.items():
+    def _set_units(self) -> None:
+        """Set units of sensors values."""
+        for sensor_id in BINARY_SENSORS:
             self._units[sensor_id] = None
 
         for sensor_id, data in SENSORS.items():
-            if (receive_tvoc_in_ppb and sensor_id == 8) or (
-                receive_hcho_in_ppb and sensor_id == 7
+            if (self._receive_tvoc_in_ppb and sensor_id == 8) or (
+                self._receive_hcho_in_ppb and sensor_id == 7
             ):
                 self._units[sensor_id] = CONCENTRATION_PARTS_PER_BILLION
             else:
                 self._units[sensor_id] = data.get(CONF_UNIT_OF_MEASUREMENT)
 
+    def is_same_account(self, username, password) -> bool:
+        """Return True if controller is connected to account with credentials."""
+        return self._username == username and self._password == password
+
+    @callback
+    def async_reconfigure(self, receive_tvoc_in_ppb, receive_hcho_in_ppb) -> None:
+        """Change options of controller without reconnection to cloud."""
+        if (receive_tvoc_in_ppb, receive_hcho_in_ppb) == (
+            self._receive_tvoc_in_ppb,
+            self._receive_hcho_in_ppb,
+        ):
+            return
+
+        _LOGGER.debug("Reconfigure account %s", self.name_secure)
+        self._receive_tvoc_in_ppb = receive_tvoc_in_ppb
+        self._receive_hcho_in_ppb = receive_hcho_in_ppb
+        self._set_units()
+
+        # Collected values are in old units
+        self._decoders = {}
+        self._device_decoders = {}
+        for data in (self._sensors, self._sensors_raw, self._rollups):
+            data.clear()
+
     @property
     def unique_id(self) -> str:
         """Return a controller unique ID."""
@@ -163,10 +234,7 @@ class Jq300Account:
         params = self.params.copy()
         params.update(extra_params)
 
-        req = PreparedRequest()
-        req.prepare_url(url, params)
-
-        return req.url
+        return str(URL(url).update_query(params))
 
     def _get_url(self, query_type, function: str, extra_params=None) -> str:
         """Generate request URL."""
@@ -181,13 +249,14 @@ class Jq300Account:
             url = self._add_url_params(url, extra_params)
         return url
 
-    # pylint: disable=too-many-return-statements,too-many-branches
     async def _async_query(
         self, query_type, function: str, extra_params=None
     ) -> Optional[dict]:
-        """Query data from cloud."""
+        """Query data from cloud.
+
+        Concurrent identical queries share one request.
+        """
         url = self._get_url(query_type, function)
-        _LOGGER.debug("Requesting URL %s", url)
 
         # allow to override params when necessary
         # and update self.params globally for the next connection
@@ -198,6 +267,79 @@ class Jq300Account:
         if extra_params:
             params.update(extra_params)
 
+        key = self._add_url_params(url, params)
+        future = self._queries_inflight.get(key)
+        if future is None:
+            future = self.hass.async_create_task(
+                self._async_do_query(query_type, function, url, params)
+            )
+            self._queries_inflight[key] = future
+            future.add_done_callback(lambda _: self._queries_inflight.pop(key, None))
+        else:
+            _LOGGER.debug("Join to in-flight request for URL %s", url)
+
+        # One waiter being cancelled must not cancel request for others
+        response = await asyncio.shield(future)
+        return deepcopy(response)
+
+    async def _async_do_query(
+        self, query_type, function: str, url: str, params: dict
+    ) -> Optional[dict]:
+        """Send query to cloud, retry on temporary errors."""
+        for attempt in range(QUERY_RETRIES + 1):
+            if attempt:
+                delay = backoff_delay(attempt - 1)
+                _LOGGER.debug("Retry request in %.1f seconds", delay)
+                await asyncio.sleep(delay)
+
+            if not self._breaker.allow_request():
+                _LOGGER.debug("Cloud queries are paused. Skip request to %s", url)
+                return None
+
+            started = perf_counter()
+            try:
+                response = await self._async_send_query(query_type, url, params)
+
+            except ApiTemporaryError as exc:
+                self.metrics.record_query(function, perf_counter() - started, False)
+                self._breaker.record_failure()
+                if attempt < QUERY_RETRIES:
+                    _LOGGER.debug("%s", exc)
+                    continue
+                _LOGGER.error("%s", exc)
+                return None
+
+            except ApiError as exc:
+                self.metrics.record_query(function, perf_counter() - started, False)
+                # Server responded, so it is alive. Retry will not help here
+                self._breaker.record_success()
+                _LOGGER.error("%s", exc)
+                return None
+
+            except Exception:
+                # Finish the request allowed by the breaker on unexpected errors
+                # too. Otherwise its half-open trial never ends
+                self.metrics.record_query(function, perf_counter() - started, False)
+                self._breaker.record_failure()
+                raise
+
+            self.metrics.record_query(function, perf_counter() - started, True)
+            self._breaker.record_success()
+            return response
+
+        return None  # pragma: no cover
+
+    @staticmethod
+    def _decode_response(content: bytes) -> dict:
+        """Decode JSON or JSONP response content."""
+        return json.loads(
+            content[13:-1] if content.startswith(b"jsoncallback(") else content
+        )
+
+    async def _async_send_query(self, query_type, url: str, params: dict) -> dict:
+        """Send query to cloud and check response."""
+        _LOGGER.debug("Requesting URL %s", url)
+
         try:
             response = await self._session.get(
                 url,
@@ -207,38 +349,48 @@ class Jq300Account:
             )
             _LOGGER.debug("_query ret %s", response.status)
 
-        # pylint: disable=broad-except
-        except Exception as err_msg:  # pragma: no cover
-            _LOGGER.error("Error! %s", err_msg)
-            return None
+            if response.status not in (
+                HTTPStatus.OK,
+                HTTPStatus.NO_CONTENT,
+            ):
+                if (
+                    response.status >= HTTPStatus.INTERNAL_SERVER_ERROR
+                    or response.status == HTTPStatus.TOO_MANY_REQUESTS
+                ):
+                    raise ApiTemporaryError(MSG_GENERIC_FAIL)
+                raise ApiError(MSG_GENERIC_FAIL)
 
-        if response.status not in (
-            HTTPStatus.OK,
-            HTTPStatus.NO_CONTENT,
-        ):  # pragma: no cover
-            _LOGGER.debug(MSG_GENERIC_FAIL)
-            return None
+            content = await response.read()
 
-        content = await response.read()
-        response = json.loads(
-            content[13:-1] if content.startswith(b"jsoncallback(") else content
-        )
+        except (asyncio.TimeoutError, ClientError) as exc:
+            raise ApiTemporaryError(f"Error! {exc!r}") from exc
+
+        try:
+            response = self._decode_response(content)
+            code = (
+                response["code"]
+                if query_type == QUERY_TYPE_API
+                else int(response["returnCode"])
+            )
+        except (ValueError, TypeError, KeyError) as exc:
+            # Proxies and the cloud itself can return an HTML error page
+            raise ApiTemporaryError(f"Malformed response: {exc!r}") from exc
 
         if query_type == QUERY_TYPE_API:
-            if response["code"] == 102:
-                _LOGGER.error(MSG_LOGIN_FAIL)
-                return None
-            if response["code"] == 9999:
-                _LOGGER.error(MSG_BUSY)
-                return None
-            if response["code"] != 2000:
-                _LOGGER.error(MSG_GENERIC_FAIL)
-                return None
+            if code == 102:
+                raise ApiError(MSG_LOGIN_FAIL)
+            if code == 9999:
+                raise ApiTemporaryError(MSG_BUSY)
+            if code != 2000:
+                # Session token can be expired. Force login on next connection
+                self.params["uid"] = -1000
+                self._async_update_connection()
+                raise ApiError(MSG_GENERIC_FAIL)
         else:
-            if int(response["returnCode"]) != 0:
-                _LOGGER.error(MSG_GENERIC_FAIL)
+            if code != 0:
                 self.params["uid"] = -1000
-                return None
+                self._async_update_connection()
+                raise ApiError(MSG_GENERIC_FAIL)
 
         return response
 
@@ -267,97 +419,110 @@ class Jq300Account:
             },
         )
         if not ret:
-            return await self.async_connect(True) if not force else False
+            self._async_update_connection()
+            return False
 
         self.params["uid"] = ret["uid"]
         self.params["safeToken"] = ret["safeToken"]
-        self._devices = {}
+        self._async_save_cache()
+        self._async_update_connection()
 
         self._mqtt_connect()
 
         return True
 
     def _mqtt_connect(self):
-        _LOGGER.debug("Start connecting to cloud MQTT-server")
         if self._mqtt is not None or not self.is_connected:
             return
 
-        # pylint: disable=unused-argument
-        def on_connect_callback(client, userdata, flags, res):
-            _LOGGER.debug("Connected to MQTT")
-            try:
-                self._mqtt_subscribe(
-                    self._get_devices_mqtt_topics(self._active_devices)
-                )
-            except Exception as exc:  # pylint: disable=broad-except
-                logging.exception(exc)
+        # MQTT client library is loaded only when it is really needed
+        # pylint: disable=import-outside-toplevel
+        from .transport import async_get_mqtt_manager
 
-        # pylint: disable=unused-argument
-        def on_message_callback(client, userdata, message):
-            try:
-                msg = json.loads(message.payload)
-                _LOGGER.debug("Received MQTT message: %s", msg)
-                self._mqtt_process_message(msg)
-            except Exception as exc:  # pylint: disable=broad-except
-                logging.exception(exc)
-
-        self._mqtt = mqtt.Client(
-            client_id="_".join(
-                (str(self.params["uid"]), str(int(dt_util.now().timestamp() * 1000)))
-            ),
-            clean_session=True,
+        self._mqtt = async_get_mqtt_manager(self.hass, MQTT_URL)
+        self._mqtt.async_subscribe(
+            self._get_devices_mqtt_topics(self._active_devices), self._mqtt_on_message
+        )
+        self._unsub_mqtt_reconnect = self._mqtt.async_listen_reconnect(
+            self._async_handle_mqtt_reconnect
         )
-        self._mqtt.enable_logger(_LOGGER)
-        self._mqtt.on_connect = on_connect_callback
-        self._mqtt.on_message = on_message_callback
-        parsed = urlparse(MQTT_URL)
-        if parsed.username is not None:
-            if parsed.password is not None:
-                self._mqtt.username_pw_set(parsed.username, parsed.password)
-            else:
-                _LOGGER.error(
-                    "The MQTT password was not found, this is required for auth"
-                )
-        self._mqtt.connect_async(host=parsed.hostname, port=parsed.port)
-        self._mqtt.loop_start()
 
     def _mqtt_subscribe(self, topics: list):
-        if self._mqtt.is_connected():
-            self._mqtt.subscribe([(x, 0) for x in topics])
+        if self._mqtt is not None:
+            self._mqtt.async_subscribe(topics, self._mqtt_on_message)
 
     def _mqtt_unsubscribe(self, topics: list):
-        if self._mqtt.is_connected():
-            self._mqtt.unsubscribe(topics)
+        if self._mqtt is not None:
+            self._mqtt.async_unsubscribe(topics, self._mqtt_on_message)
+
+    async def async_stop(self):
+        """Stop controller and release shared MQTT connection."""
+        self._ingest.async_clear()
+        for unsub in self._unsub_expire.values():
+            unsub()
+        self._unsub_expire = {}
+        if self._mqtt is not None:
+            mqtt, self._mqtt = self._mqtt, None
+            self._unsub_mqtt_reconnect()
+            await mqtt.async_release(self._mqtt_on_message)
+
+    def _mqtt_on_message(self, topic: str, payload: bytes):
+        if topic not in self._device_tokens:
+            self.metrics.dropped_unknown += 1
+            return
+
+        msg = json.loads(payload)
+        self.metrics.record_message()
+        _LOGGER.debug("Received MQTT message: %s", msg)
+        self._ingest.async_put(msg)
+
+    def _mqtt_process_batch(self, messages: List[dict]):
+        for msg in messages:
+            try:
+                self._mqtt_process_message(msg)
+            except Exception as exc:  # pylint: disable=broad-except
+                _LOGGER.exception(exc)
 
     def _mqtt_process_message(self, message: dict):
-        device_id = None
-        for dev_id, dev in self.devices.items():
-            if message["deviceToken"] == dev["deviceToken"]:
-                device_id = dev_id
+        device_id = self._device_tokens.get(message.get("deviceToken"))
         if device_id is None:
+            self.metrics.dropped_unknown += 1
             return
 
+        self.metrics.record_frame(device_id)
         if message["type"] == "V":
             _LOGGER.debug("Update sensors for device %d", device_id)
-            self._extract_sensors_data(
-                device_id,
-                int(dt_util.now().timestamp()),
-                json.loads(message["content"]),
-            )
             self.devices[device_id]["onlinets"] = monotonic()
+            if not self._available.get(device_id):
+                self._async_update_availability(device_id)
+
+            started = perf_counter()
+            res = self.get_device_decoder(device_id).decode(
+                json.loads(message["content"])
+            )
+            self.metrics.record_decode(perf_counter() - started)
+            self._set_sensors_data(device_id, int(dt_util.now().timestamp()), res)
 
         elif message["type"] == "C":
-            if self.devices.get(device_id) is None:
-                return
             online = int(message["content"])
             _LOGGER.debug("Update online status for device %d: %d", device_id, online)
             if online != self.devices[device_id].get("onlinestat"):
                 self.devices[device_id]["onlinets"] = monotonic()
             self.devices[device_id]["onlinestat"] = online
+            self._async_update_availability(device_id)
+            self._notify_device_update(device_id)
 
         else:
             _LOGGER.warning("Unknown message type: %s", message)
 
+    def _update_device_tokens(self):
+        """Rebuild index of active devices by their tokens."""
+        self._device_tokens = {
+            self._devices[dev_id]["deviceToken"]: dev_id
+            for dev_id in self._active_devices
+            if dev_id in self._devices
+        }
+
     def _get_devices_mqtt_topics(self, device_ids: list) -> list:
         if not self.devices:
             return []
@@ -384,9 +549,10 @@ class Jq300Account:
         )
 
         self._active_devices = devices
+        self._update_device_tokens()
 
         for device_id in devices:
-            self._sensors.setdefault(device_id, {})
+            self._sensors.setdefault(device_id, SensorsAverager())
 
         if unsub:
             _LOGGER.debug("Unsubscribe from MQTT topics: %s", ", ".join(unsub))
@@ -421,59 +587,263 @@ class Jq300Account:
             },
         )
         if not ret:
-            return await self.async_update_devices(True) if not force else None
+            if force or self.is_connected:
+                return None
+            # Session token is expired. Login again
+            return await self.async_update_devices(True)
+
+        self._set_devices(ret["deviceInfoBodyList"])
+        self._async_save_cache()
+
+        return self._devices
+
+    def _set_devices(self, devices: List[Dict[str, Any]]):
+        """Update available devices by list of devices info.
+
+        Devices absent in the list are removed together with their data. Known
+        devices keep their online status, only changed info fields are updated.
+        """
+        removed = set(self._devices) - {dev["deviceid"] for dev in devices}
+        if removed:
+            # Unsubscribe while devices tokens are still known
+            self.active_devices = [x for x in self._active_devices if x not in removed]
+            for device_id in removed:
+                self._remove_device(device_id)
 
         tstamp = int(dt_util.now().timestamp() * 1000)
-        for dev in ret["deviceInfoBodyList"]:
-            dev[""] = tstamp
-            dev["onlinets"] = monotonic()
-            self._devices[dev["deviceid"]] = dev
+        added = []
+        for dev in devices:
+            device_id = dev["deviceid"]
+            old = self._devices.get(device_id)
+            if old is None:
+                dev[""] = tstamp
+                dev["onlinets"] = monotonic()
+                self._devices[device_id] = dev
+                added.append(device_id)
+                continue
 
-        for device_id in self._devices:
-            self._sensors.setdefault(device_id, {})
+            # Online status of known device is tracked by MQTT frames
+            changed = {
+                k: v
+                for k, v in dev.items()
+                if k not in ("", "onlinestat", "onlinets") and old.get(k) != v
+            }
+            if not changed:
+                continue
 
-        return self._devices
+            _LOGGER.debug("Device %s info is changed: %s", device_id, list(changed))
+            if "pt_model" in changed:
+                self._device_decoders.pop(device_id, None)
+            if "deviceToken" in changed and device_id in self._active_devices:
+                self._mqtt_unsubscribe([old["deviceToken"]])
+                self._mqtt_subscribe([changed["deviceToken"]])
+            old.update(changed)
+            old[""] = tstamp
+
+        for device_id in added:
+            self._sensors.setdefault(device_id, SensorsAverager())
+            self.get_device_decoder(device_id)
+            self._async_update_availability(device_id)
+        self._update_device_tokens()
+
+    def _remove_device(self, device_id) -> None:
+        """Forget device and all its data."""
+        _LOGGER.debug("Device %s is removed from account", device_id)
+        self._devices.pop(device_id, None)
+        for data in (
+            self._sensors,
+            self._sensors_raw,
+            self._sensors_polled,
+            self._poll_intervals,
+            self._rollups,
+            self._device_decoders,
+            self._available,
+            self.metrics.last_frame,
+        ):
+            data.pop(device_id, None)
+        unsub = self._unsub_expire.pop(device_id, None)
+        if unsub is not None:
+            unsub()
+
+    async def async_load_cache(self) -> bool:
+        """Restore session and devices list saved on previous run.
+
+        Return True if account is ready to use cached data.
+        """
+        if self._store is None:
+            return False
+
+        data = await self._store.async_load()
+        if (
+            not data
+            or data.get("username") != self._username
+            or data.get("uid", -1000) <= 0
+            or not data.get("devices")
+        ):
+            return False
+
+        _LOGGER.debug("Use cached session for account %s", self.name_secure)
+
+        self.params["uid"] = data["uid"]
+        self.params["safeToken"] = data["safeToken"]
+        self._set_devices(data["devices"])
+        self._async_update_connection()
+        self._mqtt_connect()
+
+        return True
+
+    async def async_revalidate_cache(self) -> None:
+        """Check cached session and refresh devices list from cloud."""
+        _LOGGER.debug("Revalidate cached session for account %s", self.name_secure)
+
+        if await self.async_update_devices(True) is None and not self.is_connected:
+            # Session token is invalid. Login again
+            await self.async_update_devices(True)
+
+    @callback
+    def _async_save_cache(self) -> None:
+        """Schedule saving of session and devices list to storage."""
+        if self._store is None:
+            return
+
+        self._store.async_delay_save(self._get_cache_data, STORAGE_SAVE_DELAY)
+
+    def _get_cache_data(self) -> dict:
+        """Get session and devices list data to save to storage."""
+        return {
+            "username": self._username,
+            "uid": self.params["uid"],
+            "safeToken": self.params["safeToken"],
+            "devices": [
+                {k: v for k, v in dev.items() if k not in ("", "onlinets")}
+                for dev in self._devices.values()
+            ],
+        }
 
     def device_available(self, device_id) -> bool:
         """Return True if device is available."""
-        dev = self.devices.get(device_id, {})
-        device_available = dev.get("onlinestat") == 1
-        device_timeout = (monotonic() - dev.get("onlinets", 0)) <= AVAILABLE_TIMEOUT
-        online = self.available and device_available and device_timeout
+        return self._available.get(device_id, False)
+
+    @callback
+    def _async_update_connection(self) -> None:
+        """Re-evaluate availability of all devices if account (dis)connected."""
+        if self.is_connected == self._connected:
+            return
+
+        self._connected = self.is_connected
+        for device_id in set(self._devices) | set(self._available):
+            self._async_update_availability(device_id)
+
+    @callback
+    def _async_update_availability(self, device_id) -> None:
+        """Re-evaluate availability of device and notify listeners if it flips.
+
+        While device is online, one timer is kept scheduled to the moment its
+        online status expires.
+        """
+        unsub = self._unsub_expire.pop(device_id, None)
+        if unsub is not None:
+            unsub()
+
+        dev = self._devices.get(device_id, {})
+        expire = dev.get("onlinets", 0) + AVAILABLE_TIMEOUT - monotonic()
+        online = self.is_connected and dev.get("onlinestat") == 1 and expire > 0
+        if online:
+            self._unsub_expire[device_id] = async_call_later(
+                self.hass, expire, partial(self._async_handle_expire, device_id)
+            )
+
+        if online == self._available.get(device_id, False):
+            return
 
-        # pylint: disable=logging-too-many-args
         _LOGGER.debug(
-            "Availability: %s (account) AND %s (device %s) AND %s (timeout) = %s",
-            self.available,
-            device_available,
-            device_id,
-            device_timeout,
-            online,
+            "Device %s is %s", device_id, "available" if online else "unavailable"
+        )
+        self._available[device_id] = online
+        async_dispatcher_send(
+            self.hass, SIGNAL_UPDATE_AVAILABILITY.format(self.unique_id, device_id)
         )
 
-        return online
-
-    def _extract_sensors_data(self, device_id, ts_now: int, sensors: dict):
-        res = {}
-        for sensor in sensors:
-            sensor_id = sensor["seq"]
-            if (
-                sensor["content"] is None
-                or sensor["content"] == ""
-                or (sensor_id not in SENSORS and sensor_id not in BINARY_SENSORS)
-            ):
-                continue
+    @callback
+    def _async_handle_expire(self, device_id, _now=None) -> None:
+        """Handle expiration of online status of device."""
+        self._unsub_expire.pop(device_id, None)
+        self._async_update_availability(device_id)
 
-            res[sensor_id] = float(sensor["content"])
-            if sensor_id == 8 and self._receive_tvoc_in_ppb:
-                res[sensor_id] *= 1000 * 24.45 / MWEIGTH_TVOC
-            elif sensor_id == 7 and self._receive_hcho_in_ppb:
-                res[sensor_id] *= 1000 * 24.45 / MWEIGTH_HCHO
-            if self._units[sensor_id] != CONCENTRATION_MILLIGRAMS_PER_CUBIC_METER:
-                res[sensor_id] = int(res[sensor_id])
+    def _extract_sensors_data(self, device_id, ts_now: int, sensors: list):
+        res = self.get_device_decoder(device_id).decode(sensors)
+        self._set_sensors_data(device_id, ts_now, res)
 
-        self._sensors[device_id][ts_now] = res
+    def _set_sensors_data(self, device_id, ts_now: int, res: SensorsDictType):
+        """Store decoded sensors values of device and notify listeners."""
+        self._sensors.setdefault(device_id, SensorsAverager()).add(ts_now, res)
+        self._rollups.setdefault(device_id, SensorsRollup()).add(ts_now, res)
         self._sensors_raw[device_id] = res
+        self._notify_device_update(device_id)
+
+    def get_device_decoder(self, device_id) -> SensorsDecoder:
+        """Get decoder of sensors values for device model."""
+        decoder = self._device_decoders.get(device_id)
+        if decoder is None:
+            model = self._devices.get(device_id, {}).get("pt_model")
+            decoder = self._decoders.get(model)
+            if decoder is None:
+                decoder = self._decoders[model] = SensorsDecoder(
+                    MODELS.get(model, MODEL_DEFAULT_SENSORS), self._units
+                )
+            self._device_decoders[device_id] = decoder
+        return decoder
+
+    def _notify_device_update(self, device_id):
+        """Notify listeners about new frame received for device."""
+        async_dispatcher_send(
+            self.hass, SIGNAL_UPDATE_DEVICE.format(self.unique_id), device_id
+        )
+
+    @property
+    def mqtt_reconnects(self) -> int:
+        """Get number of reconnections to MQTT-server."""
+        return self._mqtt.reconnects if self._mqtt is not None else 0
+
+    def get_metric(self, metric_id: str) -> Tuple[Any, Dict[str, Any]]:
+        """Get value and attributes of runtime performance metric."""
+        metrics = self.metrics
+
+        if metric_id == METRIC_QUERY_LATENCY:
+            count = sum(x.count for x in metrics.queries.values())
+            total = sum(x.total for x in metrics.queries.values())
+            attrs = {}
+            for function, hist in metrics.queries.items():
+                attrs[function] = hist.as_dict()
+                attrs[function]["errors"] = metrics.query_errors.get(function, 0)
+            return (round(total / count * 1000, 1) if count else None), attrs
+
+        if metric_id == METRIC_MESSAGES_RATE:
+            return round(metrics.messages.rate(), 2), {"total": metrics.messages_total}
+
+        if metric_id == METRIC_DECODE_TIME:
+            return round(metrics.decode.mean * 1000, 3), metrics.decode.as_dict()
+
+        if metric_id == METRIC_DROPPED_FRAMES:
+            return metrics.dropped_unknown + self._ingest.dropped, {
+                "unknown_token": metrics.dropped_unknown,
+                "queue_overflow": self._ingest.dropped,
+                "coalesced": self._ingest.coalesced,
+            }
+
+        if metric_id == METRIC_RECONNECTS:
+            return self.mqtt_reconnects, {}
+
+        if metric_id == METRIC_LAST_FRAME_AGE:
+            ages = {}
+            for device_id in self._active_devices:
+                age = metrics.frame_age(device_id)
+                name = self._devices.get(device_id, {}).get("pt_name", device_id)
+                ages[name] = None if age is None else int(age)
+            known = [x for x in ages.values() if x is not None]
+            return (max(known) if known else None), ages
+
+        raise ValueError(f'Unknown metric "{metric_id}"')
 
     def get_sensors_raw(self, device_id) -> Optional[SensorsDictType]:
         """Get raw values of states of available sensors for device."""
@@ -482,97 +852,152 @@ class Jq300Account:
     def get_sensors(self, device_id) -> Optional[SensorsDictType]:
         """Get states of available sensors for device."""
         ts_now = int(dt_util.now().timestamp())
-        ts_overdue = ts_now - SENSORS_FILTER_FRAME.total_seconds()
-
-        self._sensors.setdefault(device_id, {})
-
-        # Filter historic states
-        res = {}
-        ts_min = max(
-            list(filter(lambda x: x <= ts_overdue, self._sensors[device_id].keys()))
-            or {ts_overdue}
-        )
-        for m_ts, val in self._sensors[device_id].items():
-            if m_ts >= ts_min:
-                res[m_ts] = val
-        self._sensors[device_id] = res
 
-        if not self._sensors[device_id]:
+        res = self._sensors.setdefault(device_id, SensorsAverager()).average(ts_now)
+        if res is None:
             return None
 
-        # Calculate average state values
-        res = {}
-        last_ts = ts_overdue
-        last_data: Dict[int, float] = {}
-        for sensor_id in self._sensors_raw[device_id]:
-            res.setdefault(sensor_id, 0)
-            last_data.setdefault(sensor_id, 0)
-
-        # Sum values
-        values = list(self._sensors[device_id].items()).copy()
-        for m_ts, data in values:
-            val_t = m_ts - last_ts
-            if val_t > 0:
-                for sensor_id, val in last_data.items():
-                    res[sensor_id] += val * val_t
-            last_ts = max(m_ts, ts_overdue)
-            last_data = data
-
-        # Add last values
-        val_t = ts_now - last_ts + 1
-        for sensor_id, val in last_data.items():
-            res[sensor_id] += val * val_t
-
-        # Average and round
-        length = max(
-            1, ts_now - max(min(self._sensors[device_id].keys()), ts_overdue) + 1
-        )
+        # Round average values
         for sensor_id in res:
-            rnd = SENSORS.get(sensor_id, {}).get(CONF_PRECISION, 0)
             res[sensor_id] = (
                 self._sensors_raw[device_id][1]
                 if sensor_id == 1
-                else int(res[sensor_id] / length)
-                if rnd == 0
-                or self._units[sensor_id]
-                in (CONCENTRATION_PARTS_PER_MILLION, CONCENTRATION_PARTS_PER_BILLION)
-                else round(res[sensor_id] / length, rnd)
+                else self._round_value(sensor_id, res[sensor_id])
             )
 
         return res
 
-    @Throttle(timedelta(minutes=10))
-    async def async_update_sensors(self):
-        """Update current states of all active devices for account."""
-        _LOGGER.debug("Updating sensors state for account %s", self.name_secure)
+    def _round_value(self, sensor_id, value: float) -> float:
+        """Round sensor value to its precision."""
+        rnd = SENSORS.get(sensor_id, {}).get(CONF_PRECISION, 0)
+        if rnd == 0 or self._units[sensor_id] in (
+            CONCENTRATION_PARTS_PER_MILLION,
+            CONCENTRATION_PARTS_PER_BILLION,
+        ):
+            return int(value)
+        return round(value, rnd)
+
+    def get_sensor_stats(
+        self, device_id, sensor_id, horizon: timedelta
+    ) -> Optional[Tuple[float, float, float]]:
+        """Get minimum, maximum and mean of sensor values for the horizon."""
+        rollup = self._rollups.get(device_id)
+        if rollup is None:
+            return None
 
         ts_now = int(dt_util.now().timestamp())
+        res = rollup.stats(sensor_id, horizon, ts_now)
+        if res is None:
+            return None
 
+        return tuple(self._round_value(sensor_id, x) for x in res)
+
+    async def async_update_sensors(self) -> bool:
+        """Update current states of stale devices for account.
+
+        Devices which receive MQTT frames are not polled. Other devices are
+        polled with interval which grows from DEVICE_POLL_MIN_INTERVAL up to
+        DEVICE_POLL_INTERVAL while MQTT stays silent for them.
+
+        Return False if all polled devices failed.
+        """
+        _LOGGER.debug("Updating sensors state for account %s", self.name_secure)
+
+        now = monotonic()
+        devices = []
         for device_id in self._active_devices:
-            if self.get_sensors_raw(device_id) is not None:
+            frame_age = self.metrics.frame_age(device_id)
+            if frame_age is not None and frame_age < DEVICE_STALE_TIMEOUT:
+                # MQTT is alive for device
+                self._poll_intervals.pop(device_id, None)
+                continue
+
+            polled = self._sensors_polled.get(device_id)
+            interval = self._poll_intervals.get(device_id)
+            if polled is not None and (
+                now - polled < (interval or DEVICE_POLL_MIN_INTERVAL)
+            ):
                 continue
 
-            ret = await self._async_query(
-                QUERY_TYPE_DEVICE,
-                "list",
-                extra_params={
-                    "deviceToken": self.devices[device_id]["deviceToken"],
-                    "timestamp": ts_now,
-                    "callback": "jsoncallback",
-                    "_": ts_now,
-                },
+            devices.append(device_id)
+            self._poll_intervals[device_id] = (
+                DEVICE_POLL_MIN_INTERVAL
+                if interval is None
+                else min(interval * 2, DEVICE_POLL_INTERVAL)
             )
-            if not ret:
-                return
 
-            self._extract_sensors_data(device_id, ts_now, ret["deviceValueVos"])
+        return await self._async_poll_devices(devices)
+
+    async def async_resync_sensors(self):
+        """Update current states of all active devices for account at once."""
+        _LOGGER.debug("Resync sensors state for account %s", self.name_secure)
+        await self._async_poll_devices(self._active_devices)
+
+    @callback
+    def _async_handle_mqtt_reconnect(self) -> None:
+        """Resync devices data lost while MQTT connection was down."""
+        self.hass.async_create_task(self.async_resync_sensors())
+
+    async def _async_poll_devices(self, devices: List[int]) -> bool:
+        """Fetch current states of devices concurrently.
+
+        Return False if no device was updated.
+        """
+        if not devices:
+            return True
+
+        devices = list(devices)
+        results = await asyncio.gather(
+            *[self._async_update_device_sensors(device_id) for device_id in devices],
+            return_exceptions=True,
+        )
+        for device_id, res in zip(devices, results):
+            if isinstance(res, Exception):
+                _LOGGER.error(
+                    "Error fetching sensors of device %s: %s", device_id, repr(res)
+                )
+        return any(res is True for res in results)
+
+    async def _async_update_device_sensors(self, device_id) -> bool:
+        """Update current states of device sensors."""
+        async with self._queries_semaphore:
+            self._sensors_polled[device_id] = monotonic()
+
+            ts_now = int(dt_util.now().timestamp())
+            try:
+                # One hanging device must not hold up the others
+                async with async_timeout.timeout(QUERY_TIME_BUDGET):
+                    ret = await self._async_query(
+                        QUERY_TYPE_DEVICE,
+                        "list",
+                        extra_params={
+                            "deviceToken": self.devices[device_id]["deviceToken"],
+                            "timestamp": ts_now,
+                            "callback": "jsoncallback",
+                            "_": ts_now,
+                        },
+                    )
+            except asyncio.TimeoutError:
+                _LOGGER.warning("Timeout fetching sensors of device %s", device_id)
+                return False
+        if not ret:
+            return False
+
+        self._extract_sensors_data(device_id, ts_now, ret["deviceValueVos"])
+        return True
+
+    async def async_update_sensors_or_timeout(
+        self, timeout: Optional[float] = UPDATE_TIMEOUT
+    ) -> bool:
+        """Update current states of all active devices for account.
 
-    async def async_update_sensors_or_timeout(self, timeout=UPDATE_TIMEOUT):
-        """Update current states of all active devices for account."""
+        Timeout None means no limit for whole update: every device poll still
+        has its own timeout.
+        """
         start = monotonic()
         try:
             async with async_timeout.timeout(timeout):
-                await self.async_update_sensors()
+                return await self.async_update_sensors()
 
         except asyncio.TimeoutError as err:
             _LOGGER.error("Timeout fetching %s device's sensors", self.name_secure)
@@ -0,0 +1,97 @@
+#  Copyright (c) 2020-2021, Andrey "Limych" Khrolenok <andrey@khrolenok.ru>
+#  Creative Commons BY-NC-SA 4.0 International Public License
+#  (see LICENSE.md or https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+"""Integration of the JQ-300/200/100 indoor air quality meter.
+
+For more details about this component, please refer to
+https://github.com/Limych/ha-jq300
+"""
+
+from collections import deque
+from datetime import timedelta
+from typing import Deque, Dict, Optional, Tuple
+
+from .const import SENSORS_FILTER_FRAME
+
+SampleType = Tuple[int, Dict[int, float]]
+
+
+class SensorsAverager:
+    """Time-weighted moving average of device sensors values.
+
+    Samples are kept in a ring buffer together with running time-weighted sums
+    of all closed intervals between them. Adding a sample and reading current
+    averages cost O(number of sensors); samples are evicted as the window slides.
+    """
+
+    def __init__(self, frame: timedelta = SENSORS_FILTER_FRAME):
+        """Initialize averager."""
+        self._frame = frame.total_seconds()
+        self._samples: Deque[SampleType] = deque()
+        self._sums: Dict[int, float] = {}
+
+    def __len__(self) -> int:
+        """Return number of samples in buffer."""
+        return len(self._samples)
+
+    def clear(self) -> None:
+        """Drop all collected samples."""
+        self._samples.clear()
+        self._sums = {}
+
+    def add(self, tstamp: int, data: Dict[int, float]) -> None:
+        """Add new sample of sensors values.
+
+        Sample with the same timestamp as the last one replaces it. Out of order
+        samples are treated as received at the time of the last sample.
+        """
+        if self._samples:
+            last_ts, last_data = self._samples[-1]
+            if tstamp <= last_ts:
+                self._samples[-1] = (last_ts, data)
+                return
+
+            val_t = tstamp - last_ts
+            for sensor_id, val in last_data.items():
+                self._sums[sensor_id] = self._sums.get(sensor_id, 0) + val * val_t
+
+        self._samples.append((tstamp, data))
+        self._evict(tstamp - self._frame)
+
+    def _evict(self, ts_overdue: float) -> None:
+        """Drop samples which are fully out of averaging window."""
+        samples = self._samples
+        while len(samples) > 1 and samples[1][0] <= ts_overdue:
+            m_ts, data = samples.popleft()
+            val_t = samples[0][0] - m_ts
+            for sensor_id, val in data.items():
+                self._sums[sensor_id] -= val * val_t
+
+        if len(samples) == 1:
+            # Reset accumulated rounding errors
+            self._sums = {}
+
+    def average(self, ts_now: int) -> Optional[Dict[int, float]]:
+        """Get time-weighted average values of sensors for the last frame."""
+        ts_overdue = ts_now - self._frame
+        self._evict(ts_overdue)
+        if not self._samples:
+            return None
+
+        first_ts, first_data = self._samples[0]
+        last_ts, last_data = self._samples[-1]
+
+        # Cut off part of the first interval which is out of window
+        cut_t = ts_overdue - first_ts if len(self._samples) > 1 else 0
+        last_t = ts_now - max(last_ts, ts_overdue) + 1
+        length = max(1, ts_now - max(first_ts, ts_overdue) + 1)
+
+        res = {}
+        for sensor_id, val in last_data.items():
+            total = self._sums.get(sensor_id, 0) + val * last_t
+            if cut_t > 0:
+                total -= first_data.get(sensor_id, 0) * cut_t
+            res[sensor_id] = total / length
+
+        return res
@@ -8,18 +8,33 @@ For more details about this component, please refer to
 https://github.com/Limych/ha-jq300
 """
 
-import asyncio
 import logging
-from typing import Optional
+from typing import Dict, Optional
 
 from homeassistant.components.binary_sensor import ENTITY_ID_FORMAT, BinarySensorEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_DEVICE_CLASS, CONF_DEVICES, CONF_ICON, CONF_NAME
-from homeassistant.core import HomeAssistant
+from homeassistant.const import (
+    CONF_DEVICE_CLASS,
+    CONF_DEVICES,
+    CONF_ICON,
+    CONF_NAME,
+    STATE_OFF,
+    STATE_ON,
+)
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import async_generate_entity_id
+from homeassistant.helpers.restore_state import RestoreEntity
 
+from . import Jq300DataUpdateCoordinator
 from .api import Jq300Account
-from .const import BINARY_SENSORS, CONF_ACCOUNT_CONTROLLER, DOMAIN
+from .const import (
+    BINARY_SENSORS,
+    CONF_ACCOUNT_CONTROLLER,
+    CONF_COORDINATOR,
+    DOMAIN,
+    SIGNAL_NEW_DEVICES,
+)
 from .entity import Jq300Entity
 
 _LOGGER = logging.getLogger(__name__)
@@ -30,53 +45,65 @@ async def async_setup_entry(
 ) -> bool:
     """Set up binary_sensor platform."""
     data = hass.data[DOMAIN][entry.entry_id]
-    account = data[CONF_ACCOUNT_CONTROLLER]  # type: Jq300Account
+    account: Jq300Account = data[CONF_ACCOUNT_CONTROLLER]
+    coordinator = data[CONF_COORDINATOR]  # type: Jq300DataUpdateCoordinator
     devices = data[CONF_DEVICES]  # type: dict
 
     _LOGGER.debug("Setup binary sensors for account %s", account.name_secure)
 
-    try:
-        await account.async_update_sensors_or_timeout()
-    except TimeoutError:
-        return False
-
-    entities = []
-    for dev_name, dev_id in devices.items():
-        sensors = account.get_sensors(dev_id)
-        while not sensors:
-            _LOGGER.debug("Sensors list is not ready. Wait for 3 sec...")
-            await asyncio.sleep(3)
-            sensors = account.get_sensors(dev_id)
-
-        sensor_id = 1
-        ent_name = BINARY_SENSORS[sensor_id][CONF_NAME]
-        entity_id = async_generate_entity_id(
-            ENTITY_ID_FORMAT, "_".join((dev_name, ent_name)), hass=hass
+    @callback
+    def async_add_devices(new_devices: Dict[str, int]) -> None:
+        """Add entities for devices."""
+        entities = []
+        for dev_name, dev_id in new_devices.items():
+            # Entities are created right away. States are filled in later
+            sensors = (coordinator.data or {}).get(dev_id) or {}
+
+            for sensor_id in account.get_device_decoder(dev_id).sensors:
+                if sensor_id not in BINARY_SENSORS:
+                    continue
+
+                ent_name = BINARY_SENSORS[sensor_id][CONF_NAME]
+                entity_id = async_generate_entity_id(
+                    ENTITY_ID_FORMAT, "_".join((dev_name, ent_name)), hass=hass
+                )
+
+                _LOGGER.debug("Initialize %s", entity_id)
+                entities.append(
+                    Jq300BinarySensor(
+                        entity_id,
+                        coordinator,
+                        dev_id,
+                        sensor_id,
+                        sensors.get(sensor_id),
+                    )
+                )
+
+        async_add_entities(entities)
+
+    async_add_devices(devices)
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_NEW_DEVICES.format(entry.entry_id), async_add_devices
         )
-
-        _LOGGER.debug("Initialize %s", entity_id)
-        entities.append(
-            Jq300BinarySensor(entity_id, account, dev_id, sensor_id, sensors[sensor_id])
-        )
-
-    async_add_entities(entities)
+    )
     return True
 
 
 # pylint: disable=too-many-instance-attributes
-class Jq300BinarySensor(Jq300Entity, BinarySensorEntity):
+class Jq300BinarySensor(Jq300Entity, BinarySensorEntity, RestoreEntity):
     """A binary sensor implementation for JQ device."""
 
     def __init__(
         self,
         entity_id: str,
-        account: Jq300Account,
+        coordinator: Jq300DataUpdateCoordinator,
         device_id,
         sensor_id,
         sensor_state: Optional[bool],
     ):
         """Initialize a binary sensor."""
-        super().__init__(entity_id, account, device_id, sensor_id, sensor_state)
+        super().__init__(entity_id, coordinator, device_id, sensor_id, sensor_state)
 
         self._attr_name = (
             f'{self._device.get("pt_name")} {BINARY_SENSORS[sensor_id][CONF_NAME]}'
@@ -85,14 +112,29 @@ class Jq300BinarySensor(Jq300Entity, BinarySensorEntity):
         self._attr_device_class = BINARY_SENSORS[sensor_id].get(CONF_DEVICE_CLASS)
         self._attr_is_on = sensor_state
 
-    def update(self):
-        """Update the sensor state if it needed."""
-        ret = self._account.get_sensors_raw(self._device_id)
-        if not ret:
+    async def async_added_to_hass(self) -> None:
+        """Restore last known state while no data received from device."""
+        await super().async_added_to_hass()
+
+        if self._attr_is_on is not None:
             return
 
-        if self._attr_is_on == ret[self._sensor_id]:
+        last_state = await self.async_get_last_state()
+        if last_state is None or last_state.state not in (STATE_ON, STATE_OFF):
             return
 
+        self._attr_is_on = last_state.state == STATE_ON
+        _LOGGER.debug("Restore state: %s = %s", self.entity_id, self._attr_is_on)
+
+    def _update_state(self) -> bool:
+        """Update the sensor state if it needed."""
+        ret = self._device_data
+        if not ret or ret.get(self._sensor_id) is None:
+            return False
+
+        if self._attr_is_on == ret[self._sensor_id]:
+            return False
+
         self._attr_is_on = ret[self._sensor_id]
         _LOGGER.debug("Update state: %s = %s", self.entity_id, self._attr_is_on)
+        return True
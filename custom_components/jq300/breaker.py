@@ -0,0 +1,96 @@
+#  Copyright (c) 2020-2021, Andrey "Limych" Khrolenok <andrey@khrolenok.ru>
+#  Creative Commons BY-NC-SA 4.0 International Public License
+#  (see LICENSE.md or https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+"""Integration of the JQ-300/200/100 indoor air quality meter.
+
+For more details about this component, please refer to
+https://github.com/Limych/ha-jq300
+"""
+
+import logging
+import random
+from time import monotonic
+
+from .const import (
+    CIRCUIT_BREAKER_THRESHOLD,
+    CIRCUIT_BREAKER_TIMEOUT,
+    QUERY_BACKOFF_BASE,
+    QUERY_BACKOFF_MAX,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+def backoff_delay(
+    attempt: int, base: float = QUERY_BACKOFF_BASE, cap: float = QUERY_BACKOFF_MAX
+) -> float:
+    """Get delay before retry attempt: exponential backoff with full jitter."""
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+class CircuitBreaker:
+    """Circuit breaker for cloud queries.
+
+    After a number of consecutive failures the circuit opens and no queries are
+    allowed for a while. Then the circuit half-opens and allows one trial query:
+    its success closes the circuit, a failure opens it again.
+    """
+
+    def __init__(
+        self,
+        threshold: int = CIRCUIT_BREAKER_THRESHOLD,
+        timeout: float = CIRCUIT_BREAKER_TIMEOUT,
+    ):
+        """Initialize circuit breaker."""
+        self._threshold = threshold
+        self._timeout = timeout
+
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        """Get current state of circuit."""
+        if self._failures < self._threshold:
+            return STATE_CLOSED
+        if monotonic() - self._opened_at < self._timeout:
+            return STATE_OPEN
+        return STATE_HALF_OPEN
+
+    def allow_request(self) -> bool:
+        """Return True if query can be sent now."""
+        state = self.state
+        if state == STATE_CLOSED:
+            return True
+        if state == STATE_OPEN or self._trial:
+            return False
+
+        # Only one trial query in half-open state
+        self._trial = True
+        return True
+
+    def record_success(self) -> None:
+        """Register successful query."""
+        if self._failures >= self._threshold:
+            _LOGGER.info("Cloud server is responding again")
+        self._failures = 0
+        self._trial = False
+
+    def record_failure(self) -> None:
+        """Register failed query."""
+        self._failures += 1
+        self._trial = False
+        if self._failures >= self._threshold:
+            if self._failures == self._threshold:
+                _LOGGER.warning(
+                    "Cloud server is not responding. Pause queries for %d seconds",
+                    self._timeout,
+                )
+            self._opened_at = monotonic()
@@ -9,9 +9,11 @@ https://github.com/Limych/ha-jq300
 """
 
 from homeassistant import config_entries
+from homeassistant.const import CONF_USERNAME
 
 # pylint: disable=unused-import
 from .const import DOMAIN
+from .util import mask_email
 
 
 class Jq300FlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
@@ -29,11 +31,23 @@ class Jq300FlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
 
         Special type of import, we're not actually going to store any data.
         Instead, we're going to rely on the values that are in config file.
+        Entry is created for each account and stores only its username.
         """
-        if self._async_current_entries():
-            return self.async_abort(reason="single_instance_allowed")
+        username = platform_config[CONF_USERNAME]
+        await self.async_set_unique_id(username)
+        self._abort_if_unique_id_configured()
 
-        return self.async_create_entry(title="configuration.yaml", data=platform_config)
+        for entry in self._async_current_entries():
+            if entry.source == config_entries.SOURCE_IMPORT and entry.unique_id is None:
+                # Entry is created by previous version for single account
+                self.hass.config_entries.async_update_entry(
+                    entry, data={CONF_USERNAME: username}, unique_id=username
+                )
+                return self.async_abort(reason="already_configured")
+
+        return self.async_create_entry(
+            title=mask_email(username), data={CONF_USERNAME: username}
+        )
 
 
 #
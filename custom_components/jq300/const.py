@@ -11,11 +11,6 @@ https://github.com/Limych/ha-jq300
 from datetime import timedelta
 from typing import Final
 
-from homeassistant.components.binary_sensor import (
-    DEVICE_CLASS_PROBLEM,
-    DOMAIN as BINARY_SENSOR,
-)
-from homeassistant.components.sensor import DOMAIN as SENSOR
 from homeassistant.const import (
     CONCENTRATION_MICROGRAMS_PER_CUBIC_METER,
     CONCENTRATION_MILLIGRAMS_PER_CUBIC_METER,
@@ -29,6 +24,9 @@ from homeassistant.const import (
     DEVICE_CLASS_TEMPERATURE,
     PERCENTAGE,
     TEMP_CELSIUS,
+    TIME_MILLISECONDS,
+    TIME_SECONDS,
+    Platform,
 )
 
 # Base component constants
@@ -53,14 +51,24 @@ If you have ANY issues with this you need to open an issue here:
 # Device classes
 
 # Platforms
-PLATFORMS: Final = [BINARY_SENSOR, SENSOR]
+PLATFORMS: Final = [Platform.BINARY_SENSOR, Platform.SENSOR]
 
 # Configuration and options
 CONF_RECEIVE_TVOC_IN_PPB: Final = "receive_tvoc_in_ppb"
 CONF_RECEIVE_HCHO_IN_PPB: Final = "receive_hcho_in_ppb"
 CONF_ACCOUNT_CONTROLLER: Final = "account_controller"
+CONF_COORDINATOR: Final = "coordinator"
 CONF_YAML: Final = "_yaml"
+DATA_RELOADING: Final = "_reloading"
 CONF_PRECISION: Final = "precision"
+CONF_MOLAR_WEIGHT: Final = "molar_weight"
+CONF_PUBLISH: Final = "publish"
+CONF_DEADBAND: Final = "deadband"
+CONF_DEADBAND_PERCENT: Final = "deadband_percent"
+CONF_MIN_INTERVAL: Final = "min_interval"
+CONF_HEARTBEAT: Final = "heartbeat"
+# Sensor platform is imported lazily, so its state classes are kept as strings
+CONF_STATE_CLASS: Final = "state_class"
 
 # Defaults
 
@@ -68,13 +76,58 @@ CONF_PRECISION: Final = "precision"
 ATTR_DEVICE_ID: Final = "device_id"
 ATTR_DEVICE_BRAND: Final = "device_brand"
 ATTR_DEVICE_MODEL: Final = "device_model"
-ATTR_RAW_STATE: Final = "raw_state"
+ATTR_MIN_VALUE: Final = "min_value"
+ATTR_MAX_VALUE: Final = "max_value"
+
+# Storage
+STORAGE_VERSION: Final = 1
+STORAGE_KEY: Final = DOMAIN + ".{}"
+STORAGE_SAVE_DELAY: Final = 10  # seconds
+
+# Shared MQTT connection manager in hass.data
+DATA_MQTT_MANAGER: Final = DOMAIN + "_mqtt"
+
+# Signals
+SIGNAL_UPDATE_DEVICE: Final = DOMAIN + "_update_{}"
+SIGNAL_NEW_DEVICES: Final = DOMAIN + "_new_devices_{}"
+SIGNAL_UPDATE_AVAILABILITY: Final = DOMAIN + "_availability_{}_{}"
 
 SENSORS_FILTER_FRAME: Final = timedelta(minutes=5)
 
+# Rollups of sensors values: (length of bucket, number of buckets)
+ROLLUP_TIERS: Final = (
+    (timedelta(minutes=1), 60),
+    (timedelta(minutes=15), 96),
+    (timedelta(hours=1), 24),
+)
+ROLLUP_HORIZONS: Final = {
+    "1h": timedelta(hours=1),
+    "24h": timedelta(hours=24),
+}
+
 QUERY_TIMEOUT: Final = 7  # seconds
-UPDATE_TIMEOUT: Final = 12  # seconds
+QUERY_RETRIES: Final = 2
+QUERY_BACKOFF_BASE: Final = 1  # seconds
+QUERY_BACKOFF_MAX: Final = 30  # seconds
+# Longest time of one query with all its retries and backoff delays
+QUERY_TIME_BUDGET: Final = (QUERY_RETRIES + 1) * QUERY_TIMEOUT + sum(
+    min(QUERY_BACKOFF_MAX, QUERY_BACKOFF_BASE * 2**x) for x in range(QUERY_RETRIES)
+)
+CIRCUIT_BREAKER_THRESHOLD: Final = 5
+CIRCUIT_BREAKER_TIMEOUT: Final = 120  # seconds
+# Enough to log in and send one more query with all retries
+UPDATE_TIMEOUT: Final = 2 * QUERY_TIME_BUDGET
 AVAILABLE_TIMEOUT: Final = 1800  # seconds
+MQTT_KEEPALIVE: Final = 60  # seconds
+MQTT_RECONNECT_MAX_DELAY: Final = 300  # seconds
+INGEST_COALESCE_WINDOW: Final = 0.5  # seconds
+INGEST_QUEUE_SIZE: Final = 1000
+
+DISCOVERY_INTERVAL: Final = timedelta(minutes=30)
+DEVICE_STALE_TIMEOUT: Final = 180  # seconds
+DEVICE_POLL_MIN_INTERVAL: Final = 60  # seconds
+DEVICE_POLL_INTERVAL: Final = 600  # seconds
+MAX_CONCURRENT_QUERIES: Final = 4
 
 MWEIGTH_TVOC: Final = 100  # g/mol
 MWEIGTH_HCHO: Final = 30.0260  # g/mol
@@ -83,7 +136,8 @@ BINARY_SENSORS: Final = {
     1: {
         CONF_NAME: "Air Quality Alert",
         CONF_ICON: "mdi:alert",
-        CONF_DEVICE_CLASS: DEVICE_CLASS_PROBLEM,
+        # Components are not imported here to keep integration import fast
+        CONF_DEVICE_CLASS: "problem",
     },
 }
 
@@ -113,12 +167,14 @@ SENSORS: Final = {
         CONF_UNIT_OF_MEASUREMENT: CONCENTRATION_MILLIGRAMS_PER_CUBIC_METER,
         CONF_ICON: "mdi:cloud",
         CONF_PRECISION: 3,
+        CONF_MOLAR_WEIGHT: MWEIGTH_HCHO,
     },
     8: {
         CONF_NAME: "TVOC",
         CONF_UNIT_OF_MEASUREMENT: CONCENTRATION_MILLIGRAMS_PER_CUBIC_METER,
         CONF_ICON: "mdi:radiator",
         CONF_PRECISION: 3,
+        CONF_MOLAR_WEIGHT: MWEIGTH_TVOC,
     },
     9: {
         CONF_NAME: "eCO2",
@@ -126,3 +182,55 @@ SENSORS: Final = {
         CONF_ICON: "mdi:molecule-co2",
     },
 }
+
+# Sensors supported by device models
+MODELS: Final = {
+    "JQ_300": (1, 4, 5, 6, 7, 8, 9),
+    "JQ300": (1, 4, 5, 7, 8, 9),
+}
+MODEL_DEFAULT_SENSORS: Final = (1, 7, 8, 9)
+
+# Runtime performance metrics of account
+METRIC_QUERY_LATENCY: Final = "query_latency"
+METRIC_MESSAGES_RATE: Final = "messages_rate"
+METRIC_DECODE_TIME: Final = "decode_time"
+METRIC_DROPPED_FRAMES: Final = "dropped_frames"
+METRIC_RECONNECTS: Final = "reconnects"
+METRIC_LAST_FRAME_AGE: Final = "last_frame_age"
+
+METRICS: Final = {
+    METRIC_QUERY_LATENCY: {
+        CONF_NAME: "Query Latency",
+        CONF_UNIT_OF_MEASUREMENT: TIME_MILLISECONDS,
+        CONF_ICON: "mdi:timer-outline",
+        CONF_STATE_CLASS: "measurement",
+    },
+    METRIC_MESSAGES_RATE: {
+        CONF_NAME: "MQTT Messages Rate",
+        CONF_UNIT_OF_MEASUREMENT: "msg/s",
+        CONF_ICON: "mdi:speedometer",
+        CONF_STATE_CLASS: "measurement",
+    },
+    METRIC_DECODE_TIME: {
+        CONF_NAME: "Message Decode Time",
+        CONF_UNIT_OF_MEASUREMENT: TIME_MILLISECONDS,
+        CONF_ICON: "mdi:timer-outline",
+        CONF_STATE_CLASS: "measurement",
+    },
+    METRIC_DROPPED_FRAMES: {
+        CONF_NAME: "Dropped Frames",
+        CONF_ICON: "mdi:delete-alert-outline",
+        CONF_STATE_CLASS: "total_increasing",
+    },
+    METRIC_RECONNECTS: {
+        CONF_NAME: "MQTT Reconnects",
+        CONF_ICON: "mdi:connection",
+        CONF_STATE_CLASS: "total_increasing",
+    },
+    METRIC_LAST_FRAME_AGE: {
+        CONF_NAME: "Last Frame Age",
+        CONF_UNIT_OF_MEASUREMENT: TIME_SECONDS,
+        CONF_ICON: "mdi:clock-alert-outline",
+        CONF_STATE_CLASS: "measurement",
+    },
+}
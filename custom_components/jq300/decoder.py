@@ -0,0 +1,76 @@
+#  Copyright (c) 2020-2021, Andrey "Limych" Khrolenok <andrey@khrolenok.ru>
+#  Creative Commons BY-NC-SA 4.0 International Public License
+#  (see LICENSE.md or https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+"""Integration of the JQ-300/200/100 indoor air quality meter.
+
+For more details about this component, please refer to
+https://github.com/Limych/ha-jq300
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional
+
+from homeassistant.const import (
+    CONCENTRATION_MILLIGRAMS_PER_CUBIC_METER,
+    CONCENTRATION_PARTS_PER_BILLION,
+    CONF_UNIT_OF_MEASUREMENT,
+)
+
+from .const import CONF_MOLAR_WEIGHT, SENSORS
+
+ConverterType = Callable[[str], float]
+
+# Molar volume of gas at 25 °C (l/mol)
+MOLAR_VOLUME = 24.45
+
+
+def _make_converter(scale: float, to_int: bool) -> ConverterType:
+    """Make function to convert sensor value from cloud."""
+    if scale != 1:
+        if to_int:
+            return lambda x: int(float(x) * scale)
+        return lambda x: float(x) * scale
+    if to_int:
+        return lambda x: int(float(x))
+    return float
+
+
+class SensorsDecoder:
+    """Decoder of sensors values of device model.
+
+    Conversion function of each sensor supported by model is built once, so
+    decoding of a frame costs one lookup and call per value. Values of sensors
+    not supported by model are skipped.
+    """
+
+    def __init__(self, sensor_ids: Iterable[int], units: Dict[int, Optional[str]]):
+        """Initialize decoder."""
+        self.sensors = tuple(sensor_ids)
+        self._converters: Dict[int, ConverterType] = {}
+
+        for sensor_id in self.sensors:
+            unit = units.get(sensor_id)
+            scale = 1.0
+            if (
+                unit == CONCENTRATION_PARTS_PER_BILLION
+                and SENSORS[sensor_id][CONF_UNIT_OF_MEASUREMENT]
+                == CONCENTRATION_MILLIGRAMS_PER_CUBIC_METER
+            ):
+                scale = 1000 * MOLAR_VOLUME / SENSORS[sensor_id][CONF_MOLAR_WEIGHT]
+
+            self._converters[sensor_id] = _make_converter(
+                scale, unit != CONCENTRATION_MILLIGRAMS_PER_CUBIC_METER
+            )
+
+    def decode(self, sensors: List[dict]) -> Dict[int, float]:
+        """Decode sensors values from cloud."""
+        converters = self._converters
+        res = {}
+        for sensor in sensors:
+            converter = converters.get(sensor["seq"])
+            content = sensor["content"]
+            if converter is None or content is None or content == "":
+                continue
+
+            res[sensor["seq"]] = converter(content)
+        return res
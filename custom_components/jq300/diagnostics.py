@@ -0,0 +1,135 @@
+#  Copyright (c) 2020-2021, Andrey "Limych" Khrolenok <andrey@khrolenok.ru>
+#  Creative Commons BY-NC-SA 4.0 International Public License
+#  (see LICENSE.md or https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+"""Integration of the JQ-300/200/100 indoor air quality meter.
+
+For more details about this component, please refer to
+https://github.com/Limych/ha-jq300
+"""
+
+from collections import deque
+import sys
+from time import monotonic
+from typing import Any, Dict
+
+from homeassistant.config_entries import SOURCE_IMPORT, ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .api import Jq300Account
+from .const import CONF_ACCOUNT_CONTROLLER, CONF_YAML, DOMAIN
+from .util import mask, mask_email
+
+REDACTED = "**REDACTED**"
+
+
+def _estimate_size(obj: Any) -> int:
+    """Estimate memory size of object with its nested containers (in bytes)."""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_estimate_size(k) + _estimate_size(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, deque)):
+        size += sum(_estimate_size(x) for x in obj)
+    return size
+
+
+def _redact_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Redact credentials in configuration."""
+    res = dict(config)
+    if CONF_USERNAME in res:
+        res[CONF_USERNAME] = mask_email(res[CONF_USERNAME])
+    if CONF_PASSWORD in res:
+        res[CONF_PASSWORD] = REDACTED
+    return res
+
+
+# pylint: disable=protected-access
+def _get_account_diagnostics(account: Jq300Account) -> Dict[str, Any]:
+    """Get snapshot of account internals."""
+    now = monotonic()
+    mqtt = account._mqtt
+
+    devices = {}
+    for device_id, device in account.devices.items():
+        averager = account._sensors.get(device_id)
+        polled = account._sensors_polled.get(device_id)
+        frame_age = account.metrics.frame_age(device_id)
+        devices[device_id] = {
+            "name": device.get("pt_name"),
+            "model": device.get("pt_model"),
+            "active": device_id in account._active_devices,
+            "available": account.device_available(device_id),
+            "online_status": device.get("onlinestat"),
+            "samples": len(averager) if averager is not None else 0,
+            "samples_memory": _estimate_size(averager._samples) if averager else 0,
+            "last_frame_age": None if frame_age is None else round(frame_age, 1),
+            "last_poll_age": None if polled is None else round(now - polled, 1),
+            "poll_interval": account._poll_intervals.get(device_id),
+        }
+
+    return {
+        "account": account.name_secure,
+        "connection": {
+            "connected": account.is_connected,
+            "available": account.available,
+        },
+        "mqtt": {
+            "started": mqtt is not None,
+            "connected": mqtt is not None and mqtt.is_connected,
+            "reconnects": account.mqtt_reconnects,
+            "topics": (
+                sorted(
+                    mask(x, 4, 2)
+                    for x in mqtt.subscriber_topics(account._mqtt_on_message)
+                )
+                if mqtt
+                else []
+            ),
+        },
+        "ingest": {
+            "pending": len(account._ingest),
+            "received": account._ingest.received,
+            "coalesced": account._ingest.coalesced,
+            "dropped": account._ingest.dropped,
+        },
+        "queries": {
+            function: {
+                **hist.as_dict(),
+                "errors": account.metrics.query_errors.get(function, 0),
+            }
+            for function, hist in account.metrics.queries.items()
+        },
+        "throttle": {
+            "circuit_breaker": account._breaker.state,
+            "in_flight": len(account._queries_inflight),
+            "free_query_slots": account._queries_semaphore._value,
+        },
+        "memory": {
+            "devices": _estimate_size(account._devices),
+            "sensors_raw": _estimate_size(account._sensors_raw),
+            "rollups": sum(
+                _estimate_size(x._buckets) for x in account._rollups.values()
+            ),
+            "samples": sum(x["samples_memory"] for x in devices.values()),
+        },
+        "devices": devices,
+    }
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> Dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    if entry.source == SOURCE_IMPORT:
+        accounts = hass.data[DOMAIN].get(CONF_YAML, {})
+        config = accounts.get(entry.data.get(CONF_USERNAME), {})
+    else:
+        config = {**entry.data, **entry.options}
+    res: Dict[str, Any] = {"config": _redact_config(config)}
+
+    data = hass.data[DOMAIN].get(entry.entry_id)
+    if data is not None:
+        res.update(_get_account_diagnostics(data[CONF_ACCOUNT_CONTROLLER]))
+
+    return res
@@ -9,28 +9,38 @@ https://github.com/Limych/ha-jq300
 """
 
 import logging
+from typing import Optional
 
 from homeassistant.const import ATTR_ATTRIBUTION
+from homeassistant.core import callback
 from homeassistant.exceptions import PlatformNotReady
-from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .api import Jq300Account
-from .const import ATTRIBUTION, DOMAIN
+from . import Jq300DataUpdateCoordinator
+from .api import SensorsDictType
+from .const import ATTRIBUTION, DOMAIN, SIGNAL_UPDATE_AVAILABILITY
 
 _LOGGER = logging.getLogger(__name__)
 
 
-class Jq300Entity(Entity):
+class Jq300Entity(CoordinatorEntity[Jq300DataUpdateCoordinator]):
     """Jq300 entity."""
 
     def __init__(
-        self, entity_id: str, account: Jq300Account, device_id, sensor_id, sensor_state
+        self,
+        entity_id: str,
+        coordinator: Jq300DataUpdateCoordinator,
+        device_id,
+        sensor_id,
+        sensor_state,
     ):
         """Initialize a JQ entity."""
-        super().__init__()
+        super().__init__(coordinator)
 
         self.entity_id = entity_id
 
+        account = coordinator.account
         if account.devices == {}:
             raise PlatformNotReady
 
@@ -38,6 +48,7 @@ class Jq300Entity(Entity):
         self._device = account.devices.get(device_id, {})
         self._device_id = device_id
         self._sensor_id = sensor_id
+        self._last_available: Optional[bool] = None
 
         self._attr_unique_id = f"{self._account.unique_id}-{device_id}-{sensor_id}"
         self._attr_name = None
@@ -56,4 +67,51 @@ class Jq300Entity(Entity):
     @property
     def available(self) -> bool:
         """Return True if entity is available."""
+        # Failed cloud poll must not hide data pushed by MQTT
         return self._account.device_available(self._device_id)
+
+    async def async_added_to_hass(self) -> None:
+        """When entity is added to hass."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_add_device_listener(
+                self._device_id, self._handle_coordinator_update
+            )
+        )
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_UPDATE_AVAILABILITY.format(
+                    self._account.unique_id, self._device_id
+                ),
+                self._handle_availability_update,
+            )
+        )
+
+    @property
+    def _device_data(self) -> Optional[SensorsDictType]:
+        """Get averaged sensors data of the device from coordinator."""
+        return (self.coordinator.data or {}).get(self._device_id)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        available = self.available
+        if self._update_state() or available != self._last_available:
+            self._last_available = available
+            self.async_write_ha_state()
+
+    @callback
+    def _handle_availability_update(self) -> None:
+        """Handle flip of device availability."""
+        available = self.available
+        if available != self._last_available:
+            self._last_available = available
+            self.async_write_ha_state()
+
+    def _update_state(self) -> bool:
+        """Update entity state from coordinator data.
+
+        Return True if state was changed.
+        """
+        return False
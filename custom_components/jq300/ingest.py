@@ -0,0 +1,100 @@
+#  Copyright (c) 2020-2021, Andrey "Limych" Khrolenok <andrey@khrolenok.ru>
+#  Creative Commons BY-NC-SA 4.0 International Public License
+#  (see LICENSE.md or https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+"""Integration of the JQ-300/200/100 indoor air quality meter.
+
+For more details about this component, please refer to
+https://github.com/Limych/ha-jq300
+"""
+
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import INGEST_COALESCE_WINDOW, INGEST_QUEUE_SIZE
+
+_LOGGER = logging.getLogger(__name__)
+
+
+BatchCallbackType = Callable[[List[dict]], None]
+
+
+class Jq300IngestQueue:
+    """Coalescing queue of incoming device messages.
+
+    Messages are collected for a short time window and then processed as one
+    batch. Within the window only the latest message of each type for each
+    device is kept.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        process_batch: BatchCallbackType,
+        window: float = INGEST_COALESCE_WINDOW,
+        max_size: int = INGEST_QUEUE_SIZE,
+    ):
+        """Initialize queue."""
+        self.hass = hass
+        self._process_batch = process_batch
+        self._window = window
+        self._max_size = max_size
+
+        self._pending: Dict[Tuple[str, str], dict] = {}
+        self._unsub_flush: Optional[CALLBACK_TYPE] = None
+
+        self.received = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        """Return number of pending messages."""
+        return len(self._pending)
+
+    @callback
+    def async_put(self, message: dict) -> None:
+        """Put new message into queue."""
+        self.received += 1
+
+        key = (message.get("deviceToken"), message.get("type"))
+        if key in self._pending:
+            self.coalesced += 1
+        elif len(self._pending) >= self._max_size:
+            self.dropped += 1
+            _LOGGER.debug("Ingest queue is full. Message dropped: %s", message)
+            return
+
+        self._pending[key] = message
+        if self._unsub_flush is None:
+            self._unsub_flush = async_call_later(
+                self.hass, self._window, self._async_flush
+            )
+
+    @callback
+    def async_flush(self) -> None:
+        """Process all pending messages immediately."""
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+        self._async_flush()
+
+    @callback
+    def async_clear(self) -> None:
+        """Drop all pending messages."""
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+            self._unsub_flush = None
+        self._pending = {}
+
+    @callback
+    def _async_flush(self, _now=None) -> None:
+        """Process pending messages as one batch."""
+        self._unsub_flush = None
+        if not self._pending:
+            return
+
+        batch = list(self._pending.values())
+        self._pending = {}
+        self._process_batch(batch)
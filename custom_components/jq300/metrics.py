@@ -0,0 +1,145 @@
+#  Copyright (c) 2020-2021, Andrey "Limych" Khrolenok <andrey@khrolenok.ru>
+#  Creative Commons BY-NC-SA 4.0 International Public License
+#  (see LICENSE.md or https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+"""Integration of the JQ-300/200/100 indoor air quality meter.
+
+For more details about this component, please refer to
+https://github.com/Limych/ha-jq300
+"""
+
+from bisect import bisect_left
+from collections import deque
+from time import monotonic
+from typing import Deque, Dict, List, Optional
+
+# Upper bounds of histogram buckets (seconds)
+HISTOGRAM_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+)
+
+
+class Histogram:
+    """Histogram of durations with fixed buckets."""
+
+    def __init__(self):
+        """Initialize histogram."""
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._buckets: List[int] = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+
+    def add(self, value: float) -> None:
+        """Add new value to histogram."""
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self._buckets[bisect_left(HISTOGRAM_BUCKETS, value)] += 1
+
+    @property
+    def mean(self) -> float:
+        """Get mean value."""
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, quantile: float) -> float:
+        """Get estimation of percentile: upper bound of its bucket."""
+        rank = quantile * self.count
+        cumulative = 0
+        for idx, num in enumerate(self._buckets[:-1]):
+            cumulative += num
+            if num and cumulative >= rank:
+                return min(HISTOGRAM_BUCKETS[idx], self.max)
+        return self.max
+
+    def as_dict(self) -> dict:
+        """Get summary of histogram (in milliseconds)."""
+        return {
+            "count": self.count,
+            "mean": round(self.mean * 1000, 3),
+            "p95": round(self.percentile(0.95) * 1000, 3),
+            "max": round(self.max * 1000, 3),
+        }
+
+
+class RateMeter:
+    """Rate of events over a sliding window."""
+
+    def __init__(self, window: int = 60):
+        """Initialize rate meter."""
+        self._window = window
+        self._started = monotonic()
+        self._bins: Deque[List[int]] = deque()
+
+    def add(self, now: Optional[float] = None) -> None:
+        """Register new event."""
+        second = int(monotonic() if now is None else now)
+        if self._bins and self._bins[-1][0] == second:
+            self._bins[-1][1] += 1
+        else:
+            self._bins.append([second, 1])
+            self._evict(second)
+
+    def _evict(self, second: int) -> None:
+        """Drop bins which are out of window."""
+        while self._bins and self._bins[0][0] <= second - self._window:
+            self._bins.popleft()
+
+    def rate(self, now: Optional[float] = None) -> float:
+        """Get events per second over the window."""
+        now = monotonic() if now is None else now
+        self._evict(int(now))
+        period = max(1.0, min(self._window, now - self._started))
+        return sum(x[1] for x in self._bins) / period
+
+
+class Jq300Metrics:
+    """Runtime performance metrics of account."""
+
+    def __init__(self):
+        """Initialize metrics."""
+        self.queries: Dict[str, Histogram] = {}
+        self.query_errors: Dict[str, int] = {}
+        self.messages = RateMeter()
+        self.messages_total = 0
+        self.decode = Histogram()
+        self.dropped_unknown = 0
+        self.last_frame: Dict[int, float] = {}
+
+    def record_query(self, function: str, duration: float, success: bool) -> None:
+        """Register finished cloud query."""
+        self.queries.setdefault(function, Histogram()).add(duration)
+        if not success:
+            self.query_errors[function] = self.query_errors.get(function, 0) + 1
+
+    def record_message(self) -> None:
+        """Register received MQTT message."""
+        self.messages_total += 1
+        self.messages.add()
+
+    def record_decode(self, decode_time: float) -> None:
+        """Register time of decoding of sensors frame."""
+        self.decode.add(decode_time)
+
+    def record_frame(self, device_id: int) -> None:
+        """Register processed frame of device."""
+        self.last_frame[device_id] = monotonic()
+
+    def frame_age(self, device_id: int) -> Optional[float]:
+        """Get seconds passed from the last frame of device."""
+        last = self.last_frame.get(device_id)
+        return None if last is None else monotonic() - last
@@ -0,0 +1,75 @@
+#  Copyright (c) 2020-2021, Andrey "Limych" Khrolenok <andrey@khrolenok.ru>
+#  Creative Commons BY-NC-SA 4.0 International Public License
+#  (see LICENSE.md or https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+"""Integration of the JQ-300/200/100 indoor air quality meter.
+
+For more details about this component, please refer to
+https://github.com/Limych/ha-jq300
+"""
+
+from time import monotonic
+from typing import Optional
+
+from .const import (
+    CONF_DEADBAND,
+    CONF_DEADBAND_PERCENT,
+    CONF_HEARTBEAT,
+    CONF_MIN_INTERVAL,
+)
+
+
+class PublishFilter:
+    """Filter of sensor state writes.
+
+    New value is published only if it differs from the last published one by
+    more than deadband and not earlier than minimal interval after the last
+    write. Suppressed changes are published anyway when heartbeat interval is
+    passed.
+    """
+
+    def __init__(
+        self,
+        deadband: float = 0,
+        deadband_percent: float = 0,
+        min_interval: float = 0,
+        heartbeat: Optional[float] = None,
+    ):
+        """Initialize filter."""
+        self._deadband = deadband
+        self._deadband_percent = deadband_percent
+        self._min_interval = min_interval
+        self._heartbeat = heartbeat
+
+        self._last_ts: Optional[float] = None
+
+    @classmethod
+    def from_config(cls, config: Optional[dict]) -> "PublishFilter":
+        """Make filter by configuration options."""
+        config = config or {}
+        return cls(
+            config.get(CONF_DEADBAND, 0),
+            config.get(CONF_DEADBAND_PERCENT, 0),
+            config.get(CONF_MIN_INTERVAL, 0),
+            config.get(CONF_HEARTBEAT),
+        )
+
+    def should_publish(self, value, last_value, now: Optional[float] = None) -> bool:
+        """Return True if new value should be written."""
+        if self._last_ts is None or value is None or last_value is None:
+            return True
+
+        elapsed = (monotonic() if now is None else now) - self._last_ts
+        if self._heartbeat is not None and elapsed >= self._heartbeat:
+            return True
+        if elapsed < self._min_interval:
+            return False
+
+        delta = abs(value - last_value)
+        return delta >= self._deadband and (
+            delta >= abs(last_value) * self._deadband_percent / 100
+        )
+
+    def mark_published(self, now: Optional[float] = None) -> None:
+        """Register that value is written."""
+        self._last_ts = monotonic() if now is None else now
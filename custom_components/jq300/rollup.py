@@ -0,0 +1,96 @@
+#  Copyright (c) 2020-2021, Andrey "Limych" Khrolenok <andrey@khrolenok.ru>
+#  Creative Commons BY-NC-SA 4.0 International Public License
+#  (see LICENSE.md or https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+"""Integration of the JQ-300/200/100 indoor air quality meter.
+
+For more details about this component, please refer to
+https://github.com/Limych/ha-jq300
+"""
+
+from collections import deque
+from datetime import timedelta
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+from .const import ROLLUP_TIERS
+
+# Bucket of samples: [start timestamp, count, sum, min, max]
+BucketType = List[float]
+StatsType = Tuple[float, float, float]
+
+
+class SensorsRollup:
+    """Multi-resolution rolling aggregates of device sensors values.
+
+    Each tier keeps a ring of fixed-length time buckets with count, sum, min and
+    max of samples fallen into them. Adding a sample updates the current bucket
+    of every tier; statistics for a horizon are read from the finest tier which
+    covers it, so they are accurate to the length of its bucket.
+    """
+
+    def __init__(self, tiers: Iterable[Tuple[timedelta, int]] = ROLLUP_TIERS):
+        """Initialize rollup."""
+        self._tiers = [(int(length.total_seconds()), size) for length, size in tiers]
+        self._buckets: Dict[int, List[Deque[BucketType]]] = {}
+
+    def __len__(self) -> int:
+        """Return number of buckets in all tiers."""
+        return sum(len(x) for tiers in self._buckets.values() for x in tiers)
+
+    def add(self, tstamp: int, data: Dict[int, float]) -> None:
+        """Add new sample of sensors values.
+
+        Out of order samples are counted in the last bucket.
+        """
+        for sensor_id, val in data.items():
+            tiers = self._buckets.get(sensor_id)
+            if tiers is None:
+                tiers = self._buckets[sensor_id] = [
+                    deque(maxlen=size) for _, size in self._tiers
+                ]
+
+            for (length, _), buckets in zip(self._tiers, tiers):
+                start = tstamp - tstamp % length
+                if buckets and buckets[-1][0] >= start:
+                    bucket = buckets[-1]
+                    bucket[1] += 1
+                    bucket[2] += val
+                    bucket[3] = min(bucket[3], val)
+                    bucket[4] = max(bucket[4], val)
+                else:
+                    buckets.append([start, 1, val, val, val])
+
+    def stats(
+        self, sensor_id: int, horizon: timedelta, ts_now: int
+    ) -> Optional[StatsType]:
+        """Get minimum, maximum and mean of sensor values for the horizon."""
+        tiers = self._buckets.get(sensor_id)
+        if tiers is None:
+            return None
+
+        horizon_t = horizon.total_seconds()
+        idx = next(
+            (
+                idx
+                for idx, (length, size) in enumerate(self._tiers)
+                if length * size >= horizon_t
+            ),
+            len(self._tiers) - 1,
+        )
+        length = self._tiers[idx][0]
+        ts_overdue = ts_now - horizon_t
+
+        count = 0
+        total = 0.0
+        res_min = res_max = None
+        for bucket in reversed(tiers[idx]):
+            if bucket[0] + length <= ts_overdue:
+                break
+            count += bucket[1]
+            total += bucket[2]
+            res_min = bucket[3] if res_min is None else min(res_min, bucket[3])
+            res_max = bucket[4] if res_max is None else max(res_max, bucket[4])
+
+        if not count:
+            return None
+        return res_min, res_max, total / count
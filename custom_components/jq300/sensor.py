@@ -7,26 +7,49 @@
 For more details about this component, please refer to
 https://github.com/Limych/ha-jq300
 """
-import asyncio
 import logging
+from typing import Dict, Optional
 
 from homeassistant.components.sensor import (
     ENTITY_ID_FORMAT,
     STATE_CLASS_MEASUREMENT,
+    RestoreSensor,
     SensorEntity,
+    SensorStateClass,
 )
 from homeassistant.const import (
+    ATTR_ATTRIBUTION,
     CONF_DEVICE_CLASS,
     CONF_DEVICES,
     CONF_ENTITY_ID,
     CONF_ICON,
     CONF_NAME,
+    CONF_UNIT_OF_MEASUREMENT,
 )
-from homeassistant.helpers.entity import async_generate_entity_id
+from homeassistant.core import callback
+from homeassistant.helpers.device_registry import DeviceEntryType
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity import EntityCategory, async_generate_entity_id
 
+from . import Jq300DataUpdateCoordinator
 from .api import Jq300Account
-from .const import ATTR_RAW_STATE, CONF_ACCOUNT_CONTROLLER, DOMAIN, SENSORS
+from .const import (
+    ATTR_MAX_VALUE,
+    ATTR_MIN_VALUE,
+    ATTRIBUTION,
+    CONF_ACCOUNT_CONTROLLER,
+    CONF_COORDINATOR,
+    CONF_PUBLISH,
+    CONF_STATE_CLASS,
+    DOMAIN,
+    METRICS,
+    NAME,
+    ROLLUP_HORIZONS,
+    SENSORS,
+    SIGNAL_NEW_DEVICES,
+)
 from .entity import Jq300Entity
+from .publish import PublishFilter
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -35,62 +58,101 @@ async def async_setup_entry(hass, entry, async_add_entities):
     """Set up sensor platform."""
     data = hass.data[DOMAIN][entry.entry_id]
     account = data[CONF_ACCOUNT_CONTROLLER]  # type: Jq300Account
+    coordinator = data[CONF_COORDINATOR]  # type: Jq300DataUpdateCoordinator
     devices = data[CONF_DEVICES]  # type: dict
+    publish = data.get(CONF_PUBLISH, {})  # type: dict
 
     _LOGGER.debug("Setup sensors for account %s", account.name_secure)
 
-    try:
-        await account.async_update_sensors_or_timeout()
-    except TimeoutError:
-        return False
+    @callback
+    def async_add_devices(new_devices: Dict[str, int]) -> None:
+        """Add entities for devices."""
+        entities = []
+        for dev_name, dev_id in new_devices.items():
+            # Entities are created by device model. States are filled in later
+            sensors = (coordinator.data or {}).get(dev_id) or {}
+
+            for sensor_id in account.get_device_decoder(dev_id).sensors:
+                if sensor_id not in SENSORS:
+                    continue
+
+                ent_name = SENSORS[sensor_id].get(
+                    CONF_ENTITY_ID, SENSORS[sensor_id][CONF_NAME]
+                )
+                entity_id = async_generate_entity_id(
+                    ENTITY_ID_FORMAT, "_".join((dev_name, ent_name)), hass=hass
+                )
+
+                _LOGGER.debug("Initialize %s", entity_id)
+                entities.append(
+                    Jq300Sensor(
+                        entity_id,
+                        coordinator,
+                        dev_id,
+                        sensor_id,
+                        sensors.get(sensor_id),
+                        publish.get(sensor_id),
+                    )
+                )
+
+                entity_id = async_generate_entity_id(
+                    ENTITY_ID_FORMAT, "_".join((dev_name, ent_name, "raw")), hass=hass
+                )
+                entities.append(
+                    Jq300RawSensor(entity_id, coordinator, dev_id, sensor_id)
+                )
+
+                for horizon_id in ROLLUP_HORIZONS:
+                    entity_id = async_generate_entity_id(
+                        ENTITY_ID_FORMAT,
+                        "_".join((dev_name, ent_name, horizon_id)),
+                        hass=hass,
+                    )
+                    entities.append(
+                        Jq300StatisticsSensor(
+                            entity_id, coordinator, dev_id, sensor_id, horizon_id
+                        )
+                    )
+
+        async_add_entities(entities)
+
+    async_add_devices(devices)
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_NEW_DEVICES.format(entry.entry_id), async_add_devices
+        )
+    )
 
     entities = []
-    for dev_name, dev_id in devices.items():
-        sensors = account.get_sensors(dev_id)
-        while not sensors:
-            _LOGGER.debug("Sensors list is not ready. Wait for 3 sec...")
-            await asyncio.sleep(3)
-            sensors = account.get_sensors(dev_id)
-
-        dev_model = account.devices.get(dev_id, {}).get("pt_model")
-        is_jq300 = dev_model == "JQ_300"
-        is_jq200 = is_jq300 or (dev_model == "JQ300")
-
-        for sensor_id, sensor_state in sensors.items():
-            if (
-                sensor_id not in SENSORS
-                or (sensor_id in (4, 5) and not is_jq200)
-                or (sensor_id == 6 and not is_jq300)
-            ):
-                continue
-
-            ent_name = SENSORS[sensor_id].get(
-                CONF_ENTITY_ID, SENSORS[sensor_id][CONF_NAME]
-            )
-            entity_id = async_generate_entity_id(
-                ENTITY_ID_FORMAT, "_".join((dev_name, ent_name)), hass=hass
-            )
-
-            _LOGGER.debug("Initialize %s", entity_id)
-            entities.append(
-                Jq300Sensor(entity_id, account, dev_id, sensor_id, sensor_state)
-            )
+    for metric_id in METRICS:
+        entity_id = async_generate_entity_id(
+            ENTITY_ID_FORMAT,
+            "_".join((DOMAIN, account.name_secure, metric_id)),
+            hass=hass,
+        )
+        entities.append(Jq300MetricSensor(entity_id, account, metric_id))
 
     async_add_entities(entities)
     return True
 
 
 # pylint: disable=too-many-instance-attributes
-class Jq300Sensor(Jq300Entity, SensorEntity):
+class Jq300Sensor(Jq300Entity, RestoreSensor):
     """A sensor implementation for JQ device."""
 
     def __init__(
-        self, entity_id, account: Jq300Account, device_id, sensor_id, sensor_state
+        self,
+        entity_id,
+        coordinator: Jq300DataUpdateCoordinator,
+        device_id,
+        sensor_id,
+        sensor_state,
+        publish_options: Optional[dict] = None,
     ):
         """Initialize a sensor."""
-        super().__init__(entity_id, account, device_id, sensor_id, sensor_state)
+        super().__init__(entity_id, coordinator, device_id, sensor_id, sensor_state)
 
-        self._raw_value = sensor_state
+        self._publish = PublishFilter.from_config(publish_options)
 
         self._attr_icon = SENSORS[sensor_id][CONF_ICON]
         self._attr_name = (
@@ -100,22 +162,172 @@ class Jq300Sensor(Jq300Entity, SensorEntity):
         self._attr_native_unit_of_measurement = self._account.units[sensor_id]
         self._attr_native_value = sensor_state
         self._attr_state_class = STATE_CLASS_MEASUREMENT
-        self._attr_extra_state_attributes[ATTR_RAW_STATE] = self._raw_value
 
-    def update(self):
-        """Update the sensor state if it needed."""
-        ret = self._account.get_sensors(self._device_id)
-        if not ret:
+    async def async_added_to_hass(self) -> None:
+        """Restore last known state while no data received from device."""
+        await super().async_added_to_hass()
+
+        if self._attr_native_value is not None:
             return
 
-        value = ret[self._sensor_id]
-        raw_value = self._account.get_sensors_raw(self._device_id)[self._sensor_id]
-        if self._attr_native_value == value and self._raw_value == raw_value:
+        last_data = await self.async_get_last_sensor_data()
+        if last_data is None:
             return
 
-        self._raw_value = raw_value
+        self._attr_native_value = last_data.native_value
+        _LOGGER.debug("Restore state: %s = %s", self.entity_id, self._attr_native_value)
+
+    def _update_state(self) -> bool:
+        """Update the sensor state if it needed."""
+        ret = self._device_data
+        if not ret or ret.get(self._sensor_id) is None:
+            return False
+
+        value = ret[self._sensor_id]
+        if self._attr_native_value == value:
+            return False
+        if not self._publish.should_publish(value, self._attr_native_value):
+            return False
+
+        self._publish.mark_published()
+        self._attr_native_value = value
+
+        _LOGGER.debug("Update state: %s = %s", self.entity_id, value)
+        return True
+
+
+class Jq300RawSensor(Jq300Entity, SensorEntity):
+    """Raw value of JQ device sensor from the last received frame.
+
+    Raw value changes on almost every frame, so this entity is disabled by
+    default and has no state class to keep it out of long-term statistics.
+    """
+
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(
+        self,
+        entity_id,
+        coordinator: Jq300DataUpdateCoordinator,
+        device_id,
+        sensor_id,
+    ):
+        """Initialize a raw value sensor."""
+        super().__init__(entity_id, coordinator, device_id, sensor_id, None)
+
+        self._attr_unique_id = f"{self._attr_unique_id}-raw"
+        self._attr_icon = SENSORS[sensor_id][CONF_ICON]
+        self._attr_name = (
+            f"{self._device.get('pt_name')} {SENSORS[sensor_id][CONF_NAME]} Raw"
+        )
+        self._attr_device_class = SENSORS[sensor_id].get(CONF_DEVICE_CLASS)
+        self._attr_native_unit_of_measurement = self._account.units[sensor_id]
+        self._attr_native_value = None
+
+        self._update_state()
+
+    def _update_state(self) -> bool:
+        """Update the sensor state if it needed."""
+        value = (self._account.get_sensors_raw(self._device_id) or {}).get(
+            self._sensor_id
+        )
+        if value is None or self._attr_native_value == value:
+            return False
+
+        self._attr_native_value = value
+        return True
+
+
+class Jq300StatisticsSensor(Jq300Entity, SensorEntity):
+    """Long-horizon statistics of JQ device sensor.
+
+    State is the mean value for the horizon, minimum and maximum are attributes.
+    """
+
+    _attr_entity_registry_enabled_default = False
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        entity_id,
+        coordinator: Jq300DataUpdateCoordinator,
+        device_id,
+        sensor_id,
+        horizon_id: str,
+    ):
+        """Initialize a statistics sensor."""
+        super().__init__(entity_id, coordinator, device_id, sensor_id, None)
+
+        self._horizon = ROLLUP_HORIZONS[horizon_id]
+
+        self._attr_unique_id = f"{self._attr_unique_id}-{horizon_id}"
+        self._attr_icon = SENSORS[sensor_id][CONF_ICON]
+        self._attr_name = (
+            f"{self._device.get('pt_name')} {SENSORS[sensor_id][CONF_NAME]}"
+            f" {horizon_id}"
+        )
+        self._attr_device_class = SENSORS[sensor_id].get(CONF_DEVICE_CLASS)
+        self._attr_native_unit_of_measurement = self._account.units[sensor_id]
+        self._attr_native_value = None
+        self._attr_state_class = STATE_CLASS_MEASUREMENT
+        self._attr_extra_state_attributes[ATTR_MIN_VALUE] = None
+        self._attr_extra_state_attributes[ATTR_MAX_VALUE] = None
+
+        self._update_state()
+
+    def _update_state(self) -> bool:
+        """Update the sensor state if it needed."""
+        stats = self._account.get_sensor_stats(
+            self._device_id, self._sensor_id, self._horizon
+        )
+        if stats is None:
+            return False
+
+        value_min, value_max, value = stats
+        attrs = self._attr_extra_state_attributes
+        if (self._attr_native_value, attrs[ATTR_MIN_VALUE], attrs[ATTR_MAX_VALUE]) == (
+            value,
+            value_min,
+            value_max,
+        ):
+            return False
 
         self._attr_native_value = value
-        self._attr_extra_state_attributes[ATTR_RAW_STATE] = raw_value
+        attrs[ATTR_MIN_VALUE] = value_min
+        attrs[ATTR_MAX_VALUE] = value_max
+        return True
 
-        _LOGGER.debug("Update state: %s = %s (%s)", self.entity_id, value, raw_value)
+
+class Jq300MetricSensor(SensorEntity):
+    """Diagnostic sensor of account runtime performance metric."""
+
+    _attr_should_poll = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, entity_id: str, account: Jq300Account, metric_id: str):
+        """Initialize a metric sensor."""
+        self.entity_id = entity_id
+
+        self._account = account
+        self._metric_id = metric_id
+
+        self._attr_unique_id = f"{account.unique_id}-{metric_id}"
+        self._attr_name = f"{account.name_secure} {METRICS[metric_id][CONF_NAME]}"
+        self._attr_icon = METRICS[metric_id][CONF_ICON]
+        self._attr_state_class = SensorStateClass(METRICS[metric_id][CONF_STATE_CLASS])
+        self._attr_native_unit_of_measurement = METRICS[metric_id].get(
+            CONF_UNIT_OF_MEASUREMENT
+        )
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, account.unique_id)},
+            "name": f"{NAME} ({account.name_secure})",
+            "entry_type": DeviceEntryType.SERVICE,
+        }
+        self._attr_extra_state_attributes = {}
+
+    async def async_update(self) -> None:
+        """Update metric value."""
+        value, attrs = self._account.get_metric(self._metric_id)
+        self._attr_native_value = value
+        self._attr_extra_state_attributes = {ATTR_ATTRIBUTION: ATTRIBUTION, **attrs}
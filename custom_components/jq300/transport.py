@@ -0,0 +1,423 @@
+#  Copyright (c) 2020-2021, Andrey "Limych" Khrolenok <andrey@khrolenok.ru>
+#  Creative Commons BY-NC-SA 4.0 International Public License
+#  (see LICENSE.md or https://creativecommons.org/licenses/by-nc-sa/4.0/)
+
+"""Integration of the JQ-300/200/100 indoor air quality meter.
+
+For more details about this component, please refer to
+https://github.com/Limych/ha-jq300
+"""
+
+import asyncio
+from datetime import timedelta
+import logging
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from urllib.parse import urlparse
+
+import paho.mqtt.client as mqtt
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+import homeassistant.util.dt as dt_util
+
+from .const import DATA_MQTT_MANAGER, MQTT_KEEPALIVE, MQTT_RECONNECT_MAX_DELAY
+
+_LOGGER = logging.getLogger(__name__)
+
+
+MessageCallbackType = Callable[[str, bytes], None]
+ConnectCallbackType = Callable[[bool], None]
+
+
+class Jq300MqttTransport:
+    """Cloud MQTT client driven by Home Assistant event loop.
+
+    Paho client is used only as a protocol implementation: its socket is watched
+    by the event loop instead of a background network thread, so all callbacks
+    are called in the event loop. Only blocking connect is run in executor.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        url: str,
+        client_id: str,
+        on_message: MessageCallbackType,
+        on_connect: Optional[ConnectCallbackType] = None,
+    ):
+        """Initialize MQTT transport."""
+        self.hass = hass
+        self._url = urlparse(url)
+        self._on_message = on_message
+        self._connect_callback = on_connect
+
+        self._topics: Set[str] = set()
+        self._connected = False
+        self.connects = 0
+        self._stopped = True
+        self._connect_task: Optional[asyncio.Task] = None
+        self._reconnect_delay = 0
+        self._unsub_misc: Optional[CALLBACK_TYPE] = None
+
+        self._client = mqtt.Client(client_id=client_id, clean_session=True)
+        self._client.enable_logger(_LOGGER)
+        self._client.on_connect = self._on_connect
+        self._client.on_disconnect = self._on_disconnect
+        self._client.on_message = self._on_message_received
+        self._client.on_socket_open = self._on_socket_open
+        self._client.on_socket_close = self._on_socket_close
+        self._client.on_socket_register_write = self._on_socket_register_write
+        self._client.on_socket_unregister_write = self._on_socket_unregister_write
+        if self._url.username is not None:
+            if self._url.password is not None:
+                self._client.username_pw_set(self._url.username, self._url.password)
+            else:
+                _LOGGER.error(
+                    "The MQTT password was not found, this is required for auth"
+                )
+
+    @property
+    def is_connected(self) -> bool:
+        """Return True if connected to MQTT-server."""
+        return self._connected
+
+    @property
+    def reconnects(self) -> int:
+        """Get number of reconnections to MQTT-server."""
+        return max(0, self.connects - 1)
+
+    @property
+    def topics(self) -> Set[str]:
+        """Get subscribed topics."""
+        return self._topics.copy()
+
+    @callback
+    def async_start(self) -> None:
+        """Start connecting to MQTT-server in background."""
+        if not self._stopped:
+            return
+
+        _LOGGER.debug("Start connecting to cloud MQTT-server")
+        self._stopped = False
+        self._async_schedule_connect()
+        self._unsub_misc = async_track_time_interval(
+            self.hass, self._async_misc, timedelta(seconds=1)
+        )
+
+    async def async_stop(self) -> None:
+        """Disconnect from MQTT-server and stop reconnecting."""
+        if self._stopped:
+            return
+
+        self._stopped = True
+        if self._connect_task is not None and not self._connect_task.done():
+            self._connect_task.cancel()
+        self._connect_task = None
+        if self._unsub_misc is not None:
+            self._unsub_misc()
+            self._unsub_misc = None
+
+        self._topics = set()
+        self._async_disconnect()
+        self._connected = False
+
+    @callback
+    def _async_disconnect(self) -> None:
+        """Close connection to MQTT-server if its socket is open."""
+        if self._client.socket() is not None:
+            self._client.disconnect()
+            # Flush DISCONNECT packet; socket is closed by client after that
+            self._client.loop_write()
+
+    @callback
+    def async_subscribe(self, topics: Iterable[str]) -> None:
+        """Subscribe to MQTT topics."""
+        new = set(topics) - self._topics
+        if not new:
+            return
+
+        self._topics |= new
+        if self._connected:
+            self._client.subscribe([(x, 0) for x in new])
+
+    @callback
+    def async_unsubscribe(self, topics: Iterable[str]) -> None:
+        """Unsubscribe from MQTT topics."""
+        old = self._topics.intersection(topics)
+        if not old:
+            return
+
+        self._topics -= old
+        if self._connected:
+            self._client.unsubscribe(list(old))
+
+    @callback
+    def _async_schedule_connect(self) -> None:
+        """Schedule (re)connection to MQTT-server if it is not in progress."""
+        if self._stopped or (
+            self._connect_task is not None and not self._connect_task.done()
+        ):
+            return
+
+        # Connection can be retried for a long time, so it is not tracked by HA
+        self._connect_task = self.hass.loop.create_task(self._async_connect())
+
+    async def _async_connect(self) -> None:
+        """Connect to MQTT-server, retry with increasing delay on errors.
+
+        Delay is reset only when server accepts connection, so it also grows
+        when server refuses connection or drops it right after connecting.
+        """
+        while not self._stopped:
+            if self._reconnect_delay:
+                _LOGGER.debug(
+                    "Reconnect to cloud MQTT-server in %d seconds",
+                    self._reconnect_delay,
+                )
+                await asyncio.sleep(self._reconnect_delay)
+                if self._stopped:
+                    return
+
+            self._reconnect_delay = min(
+                max(1, self._reconnect_delay * 2), MQTT_RECONNECT_MAX_DELAY
+            )
+            connect = self.hass.async_add_executor_job(
+                self._client.connect,
+                self._url.hostname,
+                self._url.port,
+                MQTT_KEEPALIVE,
+            )
+            try:
+                await asyncio.shield(connect)
+                return
+
+            except asyncio.CancelledError:
+                # Blocking connect can't be interrupted, so drop it when done
+                connect.add_done_callback(self._async_handle_stale_connect)
+                raise
+
+            except OSError as exc:
+                _LOGGER.warning(
+                    "Can't connect to cloud MQTT-server: %s. Retry in %d seconds",
+                    exc,
+                    self._reconnect_delay,
+                )
+
+    @callback
+    def _async_handle_stale_connect(self, connect: asyncio.Future) -> None:
+        """Close connection made after transport was stopped."""
+        if connect.cancelled() or connect.exception() is not None:
+            return
+        if self._stopped:
+            _LOGGER.debug("Drop connection to MQTT made after stop")
+            self._async_disconnect()
+
+    @callback
+    def _async_misc(self, _now) -> None:
+        """Process MQTT keepalive and timeouts."""
+        self._client.loop_misc()
+
+    # pylint: disable=unused-argument
+    def _on_connect(self, client, userdata, flags, res) -> None:
+        """Handle connection to MQTT-server."""
+        if res != mqtt.CONNACK_ACCEPTED:
+            _LOGGER.error(
+                "Unable to connect to cloud MQTT-server: %s",
+                mqtt.connack_string(res),
+            )
+            return
+
+        _LOGGER.debug("Connected to MQTT")
+        self._connected = True
+        self._reconnect_delay = 0
+        self.connects += 1
+        if self._topics:
+            self._client.subscribe([(x, 0) for x in self._topics])
+        if self._connect_callback is not None:
+            self._connect_callback(self.connects > 1)
+
+    # pylint: disable=unused-argument
+    def _on_disconnect(self, client, userdata, res) -> None:
+        """Handle disconnection from MQTT-server."""
+        _LOGGER.debug("Disconnected from MQTT (%s)", mqtt.error_string(res))
+        self._connected = False
+        self.hass.loop.call_soon_threadsafe(self._async_schedule_connect)
+
+    # pylint: disable=unused-argument
+    def _on_message_received(self, client, userdata, message) -> None:
+        """Handle new MQTT message."""
+        try:
+            self._on_message(message.topic, message.payload)
+        except Exception as exc:  # pylint: disable=broad-except
+            _LOGGER.exception(exc)
+
+    # Socket callbacks can be called from executor thread while connecting, and
+    # they are called before socket closing. So file descriptors are captured now
+    # and watchers are changed in the event loop in the order of calls. In the
+    # event loop they are changed immediately: socket can be closed right after.
+
+    def _call_in_loop(self, func, *args) -> None:
+        """Call function in the event loop."""
+        try:
+            in_loop = asyncio.get_running_loop() is self.hass.loop
+        except RuntimeError:
+            in_loop = False
+
+        if in_loop:
+            func(*args)
+        else:
+            self.hass.loop.call_soon_threadsafe(func, *args)
+
+    # pylint: disable=unused-argument
+    def _on_socket_open(self, client, userdata, sock) -> None:
+        """Start watching for socket reading."""
+        self._call_in_loop(self.hass.loop.add_reader, sock.fileno(), client.loop_read)
+
+    # pylint: disable=unused-argument
+    def _on_socket_close(self, client, userdata, sock) -> None:
+        """Stop watching for socket reading."""
+        self._call_in_loop(self.hass.loop.remove_reader, sock.fileno())
+
+    # pylint: disable=unused-argument
+    def _on_socket_register_write(self, client, userdata, sock) -> None:
+        """Start watching for socket writing."""
+        self._call_in_loop(self.hass.loop.add_writer, sock.fileno(), client.loop_write)
+
+    # pylint: disable=unused-argument
+    def _on_socket_unregister_write(self, client, userdata, sock) -> None:
+        """Stop watching for socket writing."""
+        self._call_in_loop(self.hass.loop.remove_writer, sock.fileno())
+
+
+class Jq300MqttManager:
+    """Cloud MQTT connection shared by all accounts.
+
+    All accounts use the same broker, so their device topics are multiplexed
+    over one connection. Topics are reference-counted by subscribers: a device
+    shared by several accounts is subscribed once, and its messages are routed
+    to every subscribed account.
+    """
+
+    def __init__(self, hass: HomeAssistant, url: str):
+        """Initialize MQTT connection manager."""
+        self.hass = hass
+        self._url = url
+        self._subscribers: Dict[str, Set[MessageCallbackType]] = {}
+        self._reconnect_listeners: List[CALLBACK_TYPE] = []
+        self._transport: Optional[Jq300MqttTransport] = None
+
+    @property
+    def is_connected(self) -> bool:
+        """Return True if connected to MQTT-server."""
+        return self._transport is not None and self._transport.is_connected
+
+    @property
+    def reconnects(self) -> int:
+        """Get number of reconnections to MQTT-server."""
+        return self._transport.reconnects if self._transport is not None else 0
+
+    @property
+    def topics(self) -> Set[str]:
+        """Get subscribed topics."""
+        return set(self._subscribers)
+
+    def subscriber_topics(self, on_message: MessageCallbackType) -> Set[str]:
+        """Get topics subscribed by subscriber."""
+        return {x for x, subs in self._subscribers.items() if on_message in subs}
+
+    @callback
+    def async_subscribe(
+        self, topics: Iterable[str], on_message: MessageCallbackType
+    ) -> None:
+        """Subscribe to MQTT topics."""
+        new = []
+        for topic in topics:
+            subs = self._subscribers.setdefault(topic, set())
+            if not subs:
+                new.append(topic)
+            subs.add(on_message)
+
+        if self._transport is None:
+            self._transport = Jq300MqttTransport(
+                self.hass,
+                self._url,
+                f"jq300_{int(dt_util.now().timestamp() * 1000)}",
+                self._on_message,
+                self._on_connect,
+            )
+            self._transport.async_start()
+        if new:
+            self._transport.async_subscribe(new)
+
+    @callback
+    def async_unsubscribe(
+        self, topics: Iterable[str], on_message: MessageCallbackType
+    ) -> None:
+        """Unsubscribe from MQTT topics."""
+        old = []
+        for topic in topics:
+            subs = self._subscribers.get(topic)
+            if subs is None or on_message not in subs:
+                continue
+
+            subs.discard(on_message)
+            if not subs:
+                del self._subscribers[topic]
+                old.append(topic)
+
+        if old and self._transport is not None:
+            self._transport.async_unsubscribe(old)
+
+    async def async_release(self, on_message: MessageCallbackType) -> None:
+        """Unsubscribe subscriber from all topics.
+
+        Connection is closed when there are no subscribers left.
+        """
+        self.async_unsubscribe(self.subscriber_topics(on_message), on_message)
+        if not self._subscribers and self._transport is not None:
+            transport, self._transport = self._transport, None
+            await transport.async_stop()
+
+    @callback
+    def async_listen_reconnect(self, listener: CALLBACK_TYPE) -> CALLBACK_TYPE:
+        """Listen for reconnections to MQTT-server.
+
+        Messages are lost while connection is down, so listeners can resync
+        their data. Return function to remove listener.
+        """
+        self._reconnect_listeners.append(listener)
+
+        @callback
+        def remove_listener() -> None:
+            if listener in self._reconnect_listeners:
+                self._reconnect_listeners.remove(listener)
+
+        return remove_listener
+
+    def _on_connect(self, reconnect: bool) -> None:
+        """Notify listeners about reconnection to MQTT-server."""
+        if not reconnect:
+            return
+
+        for listener in list(self._reconnect_listeners):
+            try:
+                listener()
+            except Exception as exc:  # pylint: disable=broad-except
+                _LOGGER.exception(exc)
+
+    def _on_message(self, topic: str, payload: bytes) -> None:
+        """Route MQTT message to subscribers."""
+        for on_message in list(self._subscribers.get(topic, ())):
+            try:
+                on_message(topic, payload)
+            except Exception as exc:  # pylint: disable=broad-except
+                _LOGGER.exception(exc)
+
+
+@callback
+def async_get_mqtt_manager(hass: HomeAssistant, url: str) -> Jq300MqttManager:
+    """Get shared MQTT connection manager."""
+    manager = hass.data.get(DATA_MQTT_MANAGER)
+    if manager is None:
+        manager = hass.data[DATA_MQTT_MANAGER] = Jq300MqttManager(hass, url)
+    return manager
@@ -21,7 +21,7 @@ from unittest.mock import patch
 from asynctest import CoroutineMock
 import pytest
 
-from custom_components.jq300 import Jq300Account
+from custom_components.jq300 import Jq300Account, Jq300DataUpdateCoordinator
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
@@ -55,6 +55,12 @@ async def mock_account(hass: HomeAssistant):
     return Jq300Account(hass, session, "test@email.com", "test_password", True, True)
 
 
+@pytest.fixture()
+async def mock_coordinator(hass: HomeAssistant, mock_account: Jq300Account):
+    """Make mock data update coordinator."""
+    return Jq300DataUpdateCoordinator(hass, mock_account)
+
+
 # This fixture, when used, will result in calls to async_get_data to return None. To have the call
 # return a value, we would add the `return_value=<VALUE_TO_RETURN>` parameter to the patch call.
 @pytest.fixture(name="bypass_get_data")
@@ -68,6 +74,10 @@ def bypass_get_data_fixture():
         Jq300Account,
         "async_update_devices",
         side_effect=CoroutineMock(return_value=res),
+    ), patch.object(
+        Jq300Account,
+        "async_update_sensors",
+        side_effect=CoroutineMock(return_value=True),
     ):
         yield
 
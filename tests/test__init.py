@@ -1,22 +1,35 @@
 # pylint: disable=protected-access,redefined-outer-name
 """Test integration_blueprint setup process."""
 
+import asyncio
+from unittest.mock import patch
+
+import async_timeout
+from asynctest import CoroutineMock
 import pytest
 from pytest_homeassistant_custom_component.common import (
     MockConfigEntry,
     assert_setup_component,
 )
+import voluptuous as vol
 
 from custom_components.jq300 import (
     CONF_ACCOUNT_CONTROLLER,
+    CONFIG_SCHEMA,
     DOMAIN,
+    PLATFORMS,
     Jq300Account,
+    Jq300DataUpdateCoordinator,
     async_reload_entry,
     async_setup_entry,
-    async_unload_entry,
 )
+from custom_components.jq300.const import STORAGE_KEY, STORAGE_VERSION
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers.entity_platform import async_get_platforms
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import UpdateFailed
 from homeassistant.setup import async_setup_component
 
 from tests.const import MOCK_CONFIG
@@ -24,7 +37,7 @@ from tests.const import MOCK_CONFIG
 
 async def test_async_setup(hass: HomeAssistant):
     """Test a successful setup component."""
-    with assert_setup_component(5, DOMAIN):
+    with assert_setup_component(1, DOMAIN):
         await async_setup_component(hass, DOMAIN, {DOMAIN: MOCK_CONFIG})
         await hass.async_block_till_done()
 
@@ -36,31 +49,115 @@ async def test_setup_unload_and_reload_entry(hass, bypass_get_data):
     """Test entry setup and unload."""
     # Create a mock entry so we don't have to go through config flow
     config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    config_entry.add_to_hass(hass)
 
     # Set up the entry and assert that the values set during setup are where we expect
-    # them to be. Because we have patched the Jq300DataUpdateCoordinator.async_get_data
-    # call, no code from custom_components/integration_blueprint/api.py actually runs.
+    # them to be. Because we have patched the Jq300Account.async_update_devices
+    # call, no code from custom_components/jq300/api.py actually runs.
     hass.data.setdefault(DOMAIN, {})
-    assert await async_setup_entry(hass, config_entry)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
     assert config_entry.entry_id in hass.data[DOMAIN]
-    assert isinstance(
-        hass.data[DOMAIN][config_entry.entry_id][CONF_ACCOUNT_CONTROLLER],
-        Jq300Account,
-    )
+    account = hass.data[DOMAIN][config_entry.entry_id][CONF_ACCOUNT_CONTROLLER]
+    assert isinstance(account, Jq300Account)
 
-    # Reload the entry and assert that the data from above is still there
-    assert await async_reload_entry(hass, config_entry) is None
+    # Reload the entry and assert that connection to account is reused
+    with patch.object(Jq300Account, "async_stop") as stop, patch.object(
+        Jq300Account, "async_reconfigure"
+    ) as reconfigure:
+        assert await async_reload_entry(hass, config_entry) is None
+        await hass.async_block_till_done()
+        assert stop.call_count == 0
+        reconfigure.assert_called_once_with(False, False)
     assert config_entry.entry_id in hass.data[DOMAIN]
-    assert isinstance(
-        hass.data[DOMAIN][config_entry.entry_id][CONF_ACCOUNT_CONTROLLER],
-        Jq300Account,
+    assert hass.data[DOMAIN][config_entry.entry_id][CONF_ACCOUNT_CONTROLLER] is account
+
+    # Entry is reloaded on change and new connection is made for new credentials
+    with patch.object(Jq300Account, "async_stop") as stop:
+        hass.config_entries.async_update_entry(
+            config_entry, data={**MOCK_CONFIG, "password": "new_password"}
+        )
+        await hass.async_block_till_done()
+        assert stop.call_count == 1
+    assert (
+        hass.data[DOMAIN][config_entry.entry_id][CONF_ACCOUNT_CONTROLLER] is not account
     )
 
     # Unload the entry and verify that the data has been removed
-    assert await async_unload_entry(hass, config_entry)
+    with patch.object(Jq300Account, "async_stop") as stop:
+        assert await hass.config_entries.async_unload(config_entry.entry_id)
+        assert stop.call_count == 1
     assert config_entry.entry_id not in hass.data[DOMAIN]
 
 
+async def test_stop_on_shutdown(hass, bypass_get_data):
+    """Test account is stopped on Home Assistant shutdown."""
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    with patch.object(Jq300Account, "async_stop") as stop:
+        hass.bus.async_fire(EVENT_HOMEASSISTANT_STOP)
+        await hass.async_block_till_done()
+        assert stop.call_count == 1
+
+
+async def test_setup_entry_from_cache(hass: HomeAssistant):
+    """Test entry setup with cached devices."""
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    config_entry.add_to_hass(hass)
+    released = asyncio.Event()
+
+    async def load_cache(account):
+        account._devices = {123: {"pt_name": "Kitchen", "deviceToken": "qwe"}}
+        return True
+
+    async def update_sensors():
+        await released.wait()
+        return True
+
+    revalidation = []
+
+    async def revalidate_cache():
+        revalidation.append(asyncio.current_task())
+        await asyncio.Event().wait()
+
+    with patch.object(Jq300Account, "async_load_cache", load_cache), patch.object(
+        Jq300Account, "async_revalidate_cache", side_effect=revalidate_cache
+    ), patch.object(
+        Jq300Account, "async_update_sensors", side_effect=update_sensors
+    ) as update:
+        async with async_timeout.timeout(5):
+            assert await hass.config_entries.async_setup(config_entry.entry_id)
+        released.set()
+        # Platforms are set up in background
+        async with async_timeout.timeout(1):
+            while len(async_get_platforms(hass, DOMAIN)) < len(PLATFORMS):
+                await asyncio.sleep(0)
+        assert not revalidation[0].done()
+
+        # Revalidation of cache is cancelled with entry unload
+        assert await hass.config_entries.async_unload(config_entry.entry_id)
+        async with async_timeout.timeout(1):
+            await hass.async_block_till_done()
+        assert revalidation[0].cancelled()
+        assert update.await_count == 1
+
+
+async def test_remove_entry(hass: HomeAssistant, hass_storage: dict):
+    """Test cache of removed entry is deleted."""
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    config_entry.add_to_hass(hass)
+
+    key = STORAGE_KEY.format(config_entry.entry_id)
+    await Store(hass, STORAGE_VERSION, key).async_save({"params": {"uid": 123}})
+    assert key in hass_storage
+
+    await hass.config_entries.async_remove(config_entry.entry_id)
+    assert key not in hass_storage
+
+
 async def test_setup_entry_exception(hass, error_on_get_data):
     """Test ConfigEntryNotReady when API raises an exception during entry setup."""
     config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
@@ -68,5 +165,75 @@ async def test_setup_entry_exception(hass, error_on_get_data):
     # In this case we are testing the condition where async_setup_entry raises
     # ConfigEntryNotReady using the `error_on_get_data` fixture which simulates
     # an error.
-    with pytest.raises(ConfigEntryNotReady):
+    with pytest.raises(ConfigEntryNotReady), patch.object(
+        Jq300Account, "async_stop"
+    ) as stop:
         assert await async_setup_entry(hass, config_entry)
+    # Connection made during failed setup is released
+    assert stop.call_count == 1
+
+
+async def test_coordinator(
+    mock_coordinator: Jq300DataUpdateCoordinator, mock_account: Jq300Account
+):
+    """Test data update coordinator."""
+    mock_account._active_devices = [123, 234]
+
+    with patch.object(
+        mock_account, "async_update_sensors_or_timeout", side_effect=CoroutineMock()
+    ), patch.object(
+        mock_account, "get_sensors", side_effect=lambda x: {8: x}
+    ) as get_sensors:
+        assert await mock_coordinator._async_update_data() == {
+            123: {8: 123},
+            234: {8: 234},
+        }
+        assert get_sensors.call_count == 2
+
+        updates = []
+        listener = mock_coordinator.async_add_listener(lambda: updates.append(0))
+        remove_123 = mock_coordinator.async_add_device_listener(
+            123, lambda: updates.append(123)
+        )
+        remove_234 = mock_coordinator.async_add_device_listener(
+            234, lambda: updates.append(234)
+        )
+
+        # Frame of device notifies only listeners of that device
+        mock_coordinator.async_handle_device_update(123)
+        assert updates == [123]
+
+        remove_123()
+        mock_coordinator.async_handle_device_update(123)
+        assert updates == [123]
+        remove_234()
+        listener()
+
+        assert mock_coordinator.data == {123: {8: 123}}
+        assert get_sensors.call_count == 4
+
+        # Failed poll of an offline device does not fail refresh of others
+        mock_account.async_update_sensors_or_timeout.side_effect = CoroutineMock(
+            return_value=False
+        )
+        get_sensors.side_effect = lambda x: {8: x} if x == 123 else None
+        assert await mock_coordinator._async_update_data() == {
+            123: {8: 123},
+            234: None,
+        }
+
+        # Refresh fails only when no device has data
+        get_sensors.side_effect = lambda x: None
+        with pytest.raises(UpdateFailed):
+            await mock_coordinator._async_update_data()
+
+
+async def test_config_schema():
+    """Test configuration of publishing options."""
+    config = CONFIG_SCHEMA(
+        {DOMAIN: {**MOCK_CONFIG, "publish": {"hcho": {"deadband": 0.005}}}}
+    )
+    assert config[DOMAIN][0]["publish"] == {"hcho": {"deadband": 0.005}}
+
+    with pytest.raises(vol.Invalid):
+        CONFIG_SCHEMA({DOMAIN: {**MOCK_CONFIG, "publish": {"unknown": {}}}})
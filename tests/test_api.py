@@ -1,14 +1,25 @@
 # pylint: disable=protected-access,redefined-outer-name
 """Tests for integration_blueprint api."""
 import asyncio
+from datetime import timedelta
+from http import HTTPStatus
+import json
 import logging
+from time import monotonic
 from unittest.mock import patch
 
+from aiohttp import ClientError
 from asynctest import CoroutineMock
 import pytest
 from pytest import raises
-from pytest_homeassistant_custom_component.common import load_fixture
-from pytest_homeassistant_custom_component.test_util.aiohttp import AiohttpClientMocker
+from pytest_homeassistant_custom_component.common import (
+    async_fire_time_changed,
+    load_fixture,
+)
+from pytest_homeassistant_custom_component.test_util.aiohttp import (
+    AiohttpClientMocker,
+    AiohttpClientMockResponse,
+)
 
 from custom_components.jq300.api import (
     BASE_URL_API,
@@ -22,11 +33,45 @@ from custom_components.jq300.api import (
     USERAGENT_DEVICE,
     Jq300Account,
 )
+from custom_components.jq300.averager import SensorsAverager
+from custom_components.jq300.breaker import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+)
+from custom_components.jq300.const import (
+    AVAILABLE_TIMEOUT,
+    CIRCUIT_BREAKER_THRESHOLD,
+    CIRCUIT_BREAKER_TIMEOUT,
+    DEVICE_POLL_INTERVAL,
+    DEVICE_POLL_MIN_INTERVAL,
+    METRIC_DECODE_TIME,
+    METRIC_DROPPED_FRAMES,
+    METRIC_LAST_FRAME_AGE,
+    METRIC_MESSAGES_RATE,
+    METRIC_QUERY_LATENCY,
+    METRIC_RECONNECTS,
+    QUERY_RETRIES,
+    SIGNAL_UPDATE_AVAILABILITY,
+    SIGNAL_UPDATE_DEVICE,
+    STORAGE_KEY,
+    STORAGE_VERSION,
+)
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.storage import Store
 import homeassistant.util.dt as dt_util
 
 
+@pytest.fixture(autouse=True)
+def skip_backoff():
+    """Retry failed queries without delay."""
+    with patch("custom_components.jq300.api.backoff_delay", return_value=0):
+        yield
+
+
 @pytest.fixture
 def mock_api(hass: HomeAssistant):
     """Prepare mock API class instance."""
@@ -130,7 +175,11 @@ async def test__async_query(
     assert await api._async_query(QUERY_TYPE_API, "func") == expected
     assert len(caplog.records) == 2
 
-    for code, msg in {102: MSG_LOGIN_FAIL, 9999: MSG_BUSY, 1: MSG_GENERIC_FAIL}.items():
+    for code, msg, calls in (
+        (102, MSG_LOGIN_FAIL, 1),
+        (9999, MSG_BUSY, QUERY_RETRIES + 1),
+        (1, MSG_GENERIC_FAIL, 1),
+    ):
         caplog.clear()
         aioclient_mock.clear_requests()
 
@@ -138,7 +187,8 @@ async def test__async_query(
         aioclient_mock.get(BASE_URL_API + "func", json=expected)
 
         assert await api._async_query(QUERY_TYPE_API, "func") is None
-        assert len(caplog.records) == 3
+        assert aioclient_mock.call_count == calls
+        assert caplog.records[-1].levelno == logging.ERROR
         assert caplog.records[-1].message == msg
 
     caplog.clear()
@@ -152,6 +202,118 @@ async def test__async_query(
     assert caplog.records[-1].message == MSG_GENERIC_FAIL
 
 
+async def test__async_query_single_flight(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+):
+    """Test concurrent identical queries share one request."""
+    expected = {"code": 2000, "test": "test"}
+
+    aioclient_mock.get(BASE_URL_API + "func", json=expected)
+
+    session = async_get_clientsession(hass)
+    api = Jq300Account(hass, session, "test@email.com", "test_password", False, False)
+
+    res = await asyncio.gather(
+        *[api._async_query(QUERY_TYPE_API, "func") for _ in range(5)]
+    )
+    assert res == [expected] * 5
+    assert aioclient_mock.call_count == 1
+    assert api._queries_inflight == {}
+
+    # Each caller gets its own copy of response
+    res[0]["test"] = "changed"
+    assert res[1]["test"] == "test"
+
+    # Different params are separate requests
+    await asyncio.gather(
+        api._async_query(QUERY_TYPE_API, "func", {"qwe": 1}),
+        api._async_query(QUERY_TYPE_API, "func", {"qwe": 2}),
+    )
+    assert aioclient_mock.call_count == 3
+
+    # Finished requests are not reused
+    await api._async_query(QUERY_TYPE_API, "func")
+    assert aioclient_mock.call_count == 4
+
+
+async def test__async_query_circuit_breaker(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+):
+    """Test queries are paused after repeated failures."""
+    aioclient_mock.get(BASE_URL_API + "func", status=HTTPStatus.SERVICE_UNAVAILABLE)
+
+    session = async_get_clientsession(hass)
+    api = Jq300Account(hass, session, "test@email.com", "test_password", False, False)
+
+    for _ in range(CIRCUIT_BREAKER_THRESHOLD):
+        assert await api._async_query(QUERY_TYPE_API, "func") is None
+    assert aioclient_mock.call_count == CIRCUIT_BREAKER_THRESHOLD
+    assert api._breaker.state == STATE_OPEN
+
+    # No requests while circuit is open
+    assert await api._async_query(QUERY_TYPE_API, "func") is None
+    assert aioclient_mock.call_count == CIRCUIT_BREAKER_THRESHOLD
+
+    # One trial request when circuit half-opens
+    aioclient_mock.clear_requests()
+    aioclient_mock.get(BASE_URL_API + "func", json={"code": 2000})
+    with patch(
+        "custom_components.jq300.breaker.monotonic",
+        return_value=monotonic() + CIRCUIT_BREAKER_TIMEOUT,
+    ):
+        assert api._breaker.state == STATE_HALF_OPEN
+        assert await api._async_query(QUERY_TYPE_API, "func") == {"code": 2000}
+    assert aioclient_mock.call_count == 1
+    assert api._breaker.state == STATE_CLOSED
+
+    # Auth failures do not open circuit
+    aioclient_mock.clear_requests()
+    aioclient_mock.get(BASE_URL_API + "func", json={"code": 102})
+    for _ in range(CIRCUIT_BREAKER_THRESHOLD + 1):
+        assert await api._async_query(QUERY_TYPE_API, "func") is None
+    assert aioclient_mock.call_count == CIRCUIT_BREAKER_THRESHOLD + 1
+    assert api._breaker.state == STATE_CLOSED
+
+
+async def test__async_query_malformed_response(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+):
+    """Test malformed responses are temporary errors and finish breaker trial."""
+    session = async_get_clientsession(hass)
+    api = Jq300Account(hass, session, "test@email.com", "test_password", False, False)
+
+    for kwargs in (
+        {"text": "<html>Bad Gateway</html>"},
+        {"json": {"test": "test"}},
+        {"exc": ClientError},
+    ):
+        aioclient_mock.clear_requests()
+        aioclient_mock.get(BASE_URL_API + "func", **kwargs)
+
+        api._breaker = CircuitBreaker(1, CIRCUIT_BREAKER_TIMEOUT)
+        api._breaker.record_failure()
+        with patch(
+            "custom_components.jq300.breaker.monotonic",
+            return_value=monotonic() + CIRCUIT_BREAKER_TIMEOUT,
+        ):
+            assert api._breaker.state == STATE_HALF_OPEN
+            assert await api._async_query(QUERY_TYPE_API, "func") is None
+            assert aioclient_mock.call_count == 1
+            assert api._breaker._trial is False
+
+    # Unexpected errors finish breaker trial too
+    api._breaker = CircuitBreaker(1, CIRCUIT_BREAKER_TIMEOUT)
+    api._breaker.record_failure()
+    with patch(
+        "custom_components.jq300.breaker.monotonic",
+        return_value=monotonic() + CIRCUIT_BREAKER_TIMEOUT,
+    ), patch.object(api, "_async_send_query", side_effect=RuntimeError), raises(
+        RuntimeError
+    ):
+        await api._async_query(QUERY_TYPE_API, "func")
+    assert api._breaker._trial is False
+
+
 async def test_async_connect(hass: HomeAssistant, aioclient_mock: AiohttpClientMocker):
     """Test (Re)Connect to account and return connection status."""
     login_json = load_fixture("loginByEmail.json")
@@ -170,8 +332,13 @@ async def test_async_connect(hass: HomeAssistant, aioclient_mock: AiohttpClientM
         assert await api.async_connect()
         assert len(aioclient_mock.mock_calls) == 1
 
+        # Known devices are kept on re-login
+        api._devices = {123: {"deviceToken": "qwe"}}
+        api._device_tokens = {"qwe": 123}
         assert await api.async_connect(True)
         assert len(aioclient_mock.mock_calls) == 2
+        assert api.devices == {123: {"deviceToken": "qwe"}}
+        assert api._device_tokens == {"qwe": 123}
 
 
 async def test_async_update_devices(
@@ -229,17 +396,104 @@ async def test_async_update_devices(
     assert aioclient_mock.call_count == 1
 
     res = await api.async_update_devices(True)
-    #
-    assert res[43133][""] > 0
-    res[43133].pop("")
-    assert res[43133]["onlinets"] > 0
-    res[43133].pop("onlinets")
-    #
+    # Unchanged known device is kept as is
     assert res == expected
 
     assert aioclient_mock.call_count == 2
 
-    assert api._sensors == {43133: {}}
+    assert api._device_tokens == {}
+
+    api.active_devices = [43133]
+    assert api._device_tokens == {"26E84E117417B97BA417": 43133}
+
+    assert list(api._sensors) == [43133]
+    assert len(api._sensors[43133]) == 0
+
+
+async def test_cache(hass: HomeAssistant, aioclient_mock: AiohttpClientMocker):
+    """Test saving and restoring of session and devices list."""
+    aioclient_mock.get(
+        BASE_URL_API + "deviceManager", text=load_fixture("deviceManager.json")
+    )
+
+    session = async_get_clientsession(hass)
+    store = Store(hass, STORAGE_VERSION, STORAGE_KEY.format("test"))
+    api = Jq300Account(
+        hass, session, "test@email.com", "test_password", False, False, store=store
+    )
+
+    assert await api.async_load_cache() is False
+
+    api.params["uid"] = 123
+    api.params["safeToken"] = "token"
+    with patch.object(store, "async_delay_save") as delay_save:
+        await api.async_update_devices()
+        assert delay_save.call_count == 1
+
+    data = api._get_cache_data()
+    assert data["username"] == "test@email.com"
+    assert data["uid"] == 123
+    assert data["safeToken"] == "token"
+    assert len(data["devices"]) == 1
+    assert "" not in data["devices"][0]
+    assert "onlinets" not in data["devices"][0]
+
+    await store.async_save(data)
+
+    # Cache of another account is ignored
+    store = Store(hass, STORAGE_VERSION, STORAGE_KEY.format("test"))
+    other = Jq300Account(
+        hass, session, "other@email.com", "test_password", False, False, store=store
+    )
+    assert await other.async_load_cache() is False
+    assert other.devices == {}
+
+    store = Store(hass, STORAGE_VERSION, STORAGE_KEY.format("test"))
+    api2 = Jq300Account(
+        hass, session, "test@email.com", "test_password", False, False, store=store
+    )
+    with patch.object(api2, "_mqtt_connect") as mqtt_connect:
+        assert await api2.async_load_cache() is True
+        assert mqtt_connect.call_count == 1
+    assert api2.params["uid"] == 123
+    assert api2.params["safeToken"] == "token"
+    assert list(api2.devices) == [43133]
+    assert api2.devices[43133]["onlinets"] > 0
+    assert aioclient_mock.call_count == 1
+
+
+async def test_async_revalidate_cache(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+):
+    """Test revalidation of cached session."""
+    session = async_get_clientsession(hass)
+    api = Jq300Account(hass, session, "test@email.com", "test_password", False, False)
+    api.params["uid"] = 123
+
+    devices_json = load_fixture("deviceManager.json")
+    calls = []
+
+    async def _devices_response(method, url, data):
+        # Expired session token is reported on first request only
+        calls.append(url)
+        text = '{"code": 101}' if len(calls) == 1 else devices_json
+        return AiohttpClientMockResponse(method, url, text=text)
+
+    aioclient_mock.get(BASE_URL_API + "deviceManager", side_effect=_devices_response)
+    aioclient_mock.get(
+        BASE_URL_API + "loginByEmail", text=load_fixture("loginByEmail.json")
+    )
+
+    with patch.object(api, "_mqtt_connect"):
+        await api.async_revalidate_cache()
+
+    assert api.is_connected
+    assert list(api.devices) == [43133]
+    assert [call[1].path for call in aioclient_mock.mock_calls] == [
+        "/ypyt-api/api/app/deviceManager",
+        "/ypyt-api/api/app/loginByEmail",
+        "/ypyt-api/api/app/deviceManager",
+    ]
 
 
 async def test__get_devices_mqtt_topics(mock_api):
@@ -272,6 +526,77 @@ async def test_active_devices(mock_api):
         assert mock_api.active_devices == [234]
         assert mock_api._mqtt_subscribe.call_count == 2
         assert mock_api._mqtt_unsubscribe.call_count == 1
+        assert mock_api._device_tokens == {"asd": 234}
+
+
+async def test_async_reconfigure(mock_api):
+    """Test changing of units without reconnection."""
+    mock_api._extract_sensors_data(123, 100, [{"seq": 8, "content": "0.1"}])
+    assert mock_api.get_sensors_raw(123) == {8: 0.1}
+
+    mock_api.async_reconfigure(False, False)
+    assert mock_api.get_sensors_raw(123) == {8: 0.1}
+
+    mock_api.async_reconfigure(True, False)
+    assert mock_api.units[8] == "ppb"
+    assert mock_api.get_sensors_raw(123) is None
+
+    mock_api._extract_sensors_data(123, 100, [{"seq": 8, "content": "0.1"}])
+    assert mock_api.get_sensors_raw(123) == {8: 24}
+
+
+async def test__set_devices(mock_api):
+    """Test removed devices are forgotten and unsubscribed."""
+    mock_api._set_devices(
+        [
+            {"deviceid": 123, "deviceToken": "qwe", "pt_model": "JQ_300"},
+            {"deviceid": 234, "deviceToken": "asd", "pt_model": "JQ_300"},
+        ]
+    )
+    with patch.object(mock_api, "_mqtt_unsubscribe"), patch.object(
+        mock_api, "_mqtt_subscribe"
+    ):
+        mock_api.active_devices = [123, 234]
+        mock_api._extract_sensors_data(234, 100, [{"seq": 9, "content": "400"}])
+        decoder = mock_api.get_device_decoder(123)
+
+        mock_api._set_devices(
+            [{"deviceid": 123, "deviceToken": "qwe", "pt_model": "JQ_300"}]
+        )
+
+        mock_api._mqtt_unsubscribe.assert_called_once_with(["asd"])
+        assert mock_api.active_devices == [123]
+        assert list(mock_api.devices) == [123]
+        assert mock_api._device_tokens == {"qwe": 123}
+        assert 234 not in mock_api._sensors
+        assert 234 not in mock_api._sensors_raw
+        assert 234 not in mock_api._rollups
+        # Unchanged device is kept as is
+        assert mock_api.get_device_decoder(123) is decoder
+
+        # Known device keeps its online status, changed info is updated
+        device = mock_api.devices[123]
+        device["onlinestat"] = 0
+        onlinets = device["onlinets"]
+        mock_api._set_devices(
+            [
+                {
+                    "deviceid": 123,
+                    "deviceToken": "zxc",
+                    "pt_model": "JQ_300",
+                    "pt_name": "Kitchen",
+                    "onlinestat": 1,
+                }
+            ]
+        )
+        assert mock_api.devices[123] is device
+        assert device["onlinestat"] == 0
+        assert device["onlinets"] == onlinets
+        assert device["pt_name"] == "Kitchen"
+        assert mock_api._device_tokens == {"zxc": 123}
+        mock_api._mqtt_unsubscribe.assert_called_with(["qwe"])
+        mock_api._mqtt_subscribe.assert_called_with(["zxc"])
+        assert mock_api.get_device_decoder(123) is decoder
 
 
 async def test__extract_sensors_data(mock_api):
@@ -284,14 +609,193 @@ async def test__extract_sensors_data(mock_api):
     assert mock_api._sensors == {}
     assert mock_api._sensors_raw == {}
 
-    mock_api._sensors.setdefault(123, {})
-
     mock_api._extract_sensors_data(123, 234, data)
 
-    assert mock_api._sensors == {123: {234: {8: 2700.0, 9: 421}}}
+    assert list(mock_api._sensors) == [123]
+    assert mock_api._sensors[123].average(234) == {8: 2700.0, 9: 421}
     assert mock_api._sensors_raw == {123: {8: 2700.0, 9: 421}}
 
 
+async def test__mqtt_process_message(hass: HomeAssistant, mock_api):
+    """Test MQTT messages push device updates to listeners."""
+    mock_api._devices = {123: {"deviceToken": "qwe"}, 234: {"deviceToken": "zxc"}}
+    mock_api.active_devices = [123]
+    updates = []
+    async_dispatcher_connect(
+        hass, SIGNAL_UPDATE_DEVICE.format(mock_api.unique_id), updates.append
+    )
+
+    # Messages for unknown and inactive devices are dropped before decoding
+    mock_api._mqtt_process_message(
+        {"deviceToken": "asd", "type": "V", "content": "invalid"}
+    )
+    mock_api._mqtt_process_message(
+        {"deviceToken": "zxc", "type": "V", "content": "invalid"}
+    )
+    await hass.async_block_till_done()
+    assert updates == []
+    assert mock_api.get_sensors_raw(234) is None
+
+    mock_api._mqtt_process_message(
+        {
+            "deviceToken": "qwe",
+            "type": "V",
+            "content": '[{"content": "421", "dptId": 1, "seq": 9}]',
+        }
+    )
+    await hass.async_block_till_done()
+    assert updates == [123]
+    assert mock_api.get_sensors_raw(123) == {9: 421}
+
+    mock_api._mqtt_process_message({"deviceToken": "qwe", "type": "C", "content": "1"})
+    await hass.async_block_till_done()
+    assert updates == [123, 123]
+    assert mock_api.devices[123]["onlinestat"] == 1
+
+
+async def test_device_available(hass: HomeAssistant, mock_api):
+    """Test device availability is tracked by events and expiry timer."""
+    flips = []
+    async_dispatcher_connect(
+        hass,
+        SIGNAL_UPDATE_AVAILABILITY.format(mock_api.unique_id, 123),
+        lambda: flips.append(mock_api.device_available(123)),
+    )
+
+    mock_api._set_devices([{"deviceid": 123, "deviceToken": "qwe", "onlinestat": 1}])
+    mock_api.active_devices = [123]
+    await hass.async_block_till_done()
+    assert mock_api.device_available(123) is False
+    assert flips == []
+
+    # Account connected
+    mock_api.params["uid"] = 1
+    mock_api._async_update_connection()
+    await hass.async_block_till_done()
+    assert mock_api.device_available(123) is True
+    assert flips == [True]
+
+    # Same status does not notify listeners
+    mock_api._mqtt_process_message({"deviceToken": "qwe", "type": "C", "content": "1"})
+    await hass.async_block_till_done()
+    assert flips == [True]
+
+    mock_api._mqtt_process_message({"deviceToken": "qwe", "type": "C", "content": "0"})
+    await hass.async_block_till_done()
+    assert mock_api.device_available(123) is False
+    assert flips == [True, False]
+
+    mock_api._mqtt_process_message({"deviceToken": "qwe", "type": "C", "content": "1"})
+    await hass.async_block_till_done()
+    assert flips == [True, False, True]
+
+    # Online status expires without any new frames
+    with patch(
+        "custom_components.jq300.api.monotonic",
+        return_value=monotonic() + AVAILABLE_TIMEOUT + 1,
+    ):
+        async_fire_time_changed(
+            hass, dt_util.utcnow() + timedelta(seconds=AVAILABLE_TIMEOUT + 1)
+        )
+        await hass.async_block_till_done()
+    assert mock_api.device_available(123) is False
+    assert flips == [True, False, True, False]
+    assert 123 not in mock_api._unsub_expire
+
+    # New frame makes device available again
+    mock_api._mqtt_process_message({"deviceToken": "qwe", "type": "V", "content": "[]"})
+    await hass.async_block_till_done()
+    assert flips == [True, False, True, False, True]
+
+    # Account disconnected
+    mock_api.params["uid"] = -1000
+    mock_api._async_update_connection()
+    await hass.async_block_till_done()
+    assert mock_api.device_available(123) is False
+    assert flips == [True, False, True, False, True, False]
+    assert mock_api._unsub_expire == {}
+
+
+async def test__mqtt_on_message(hass: HomeAssistant, mock_api):
+    """Test MQTT messages are coalesced before processing."""
+    mock_api._devices = {123: {"deviceToken": "qwe"}}
+    mock_api.active_devices = [123]
+
+    for val in (421, 422):
+        mock_api._mqtt_on_message(
+            "qwe",
+            json.dumps(
+                {
+                    "deviceToken": "qwe",
+                    "type": "V",
+                    "content": json.dumps([{"content": val, "seq": 9}]),
+                }
+            ).encode(),
+        )
+    mock_api._mqtt_on_message("asd", b"invalid")
+
+    assert mock_api.get_sensors_raw(123) is None
+
+    mock_api._ingest.async_flush()
+    assert mock_api.get_sensors_raw(123) == {9: 422}
+    assert mock_api._ingest.coalesced == 1
+
+
+async def test_get_metric(hass: HomeAssistant, aioclient_mock: AiohttpClientMocker):
+    """Test runtime performance metrics of account."""
+    aioclient_mock.get(BASE_URL_API + "func", json={"code": 2000})
+    aioclient_mock.get(BASE_URL_API + "fail", json={"code": 1})
+
+    session = async_get_clientsession(hass)
+    api = Jq300Account(hass, session, "test@email.com", "test_password", False, False)
+    api._devices = {123: {"deviceToken": "qwe", "pt_name": "Kitchen"}}
+    api.active_devices = [123]
+
+    assert api.get_metric(METRIC_QUERY_LATENCY) == (None, {})
+    assert api.get_metric(METRIC_LAST_FRAME_AGE) == (None, {"Kitchen": None})
+
+    await api._async_query(QUERY_TYPE_API, "func")
+    await api._async_query(QUERY_TYPE_API, "fail")
+    value, attrs = api.get_metric(METRIC_QUERY_LATENCY)
+    assert value is not None
+    assert attrs["func"]["count"] == 1
+    assert attrs["func"]["errors"] == 0
+    assert attrs["fail"]["errors"] == 1
+
+    api._mqtt_on_message("qwe", b'{"deviceToken": "qwe", "type": "C", "content": "1"}')
+    api._mqtt_on_message("asd", b"{}")
+    api._ingest.async_flush()
+
+    value, attrs = api.get_metric(METRIC_MESSAGES_RATE)
+    assert value > 0
+    assert attrs == {"total": 1}
+    # Only sensors frames are decoded
+    assert api.get_metric(METRIC_DECODE_TIME)[1]["count"] == 0
+    with patch("custom_components.jq300.api.perf_counter", side_effect=[1.0, 1.25]):
+        api._mqtt_process_message(
+            {
+                "deviceToken": "qwe",
+                "type": "V",
+                "content": '[{"seq": 9, "content": 400}]',
+            }
+        )
+    assert api.get_metric(METRIC_DECODE_TIME)[1] == {
+        "count": 1,
+        "mean": 250.0,
+        "p95": 250.0,
+        "max": 250.0,
+    }
+    assert api.get_metric(METRIC_DROPPED_FRAMES) == (
+        1,
+        {"unknown_token": 1, "queue_overflow": 0, "coalesced": 0},
+    )
+    assert api.get_metric(METRIC_RECONNECTS) == (0, {})
+    assert api.get_metric(METRIC_LAST_FRAME_AGE) == (0, {"Kitchen": 0})
+
+    with raises(ValueError):
+        api.get_metric("unknown")
+
+
 async def test_get_sensors_raw(mock_api):
     """Test get raw values of states of available sensors for device."""
     assert mock_api._sensors_raw == {}
@@ -309,7 +813,9 @@ async def test_get_sensors(mock_api):
     ts_now = int(dt_util.now().timestamp())
 
     mock_api._sensors_raw = {123: {8: 456, 9: 567}}
-    mock_api._sensors = {123: {ts_now - 1: {8: 234, 9: 345}, ts_now: {8: 456, 9: 567}}}
+    mock_api._sensors = {123: SensorsAverager()}
+    mock_api._sensors[123].add(ts_now - 1, {8: 234, 9: 345})
+    mock_api._sensors[123].add(ts_now, {8: 456, 9: 567})
 
     assert mock_api.get_sensors(123) == {8: 345.0, 9: 456}
     assert mock_api.get_sensors(234) is None
@@ -330,8 +836,7 @@ async def test_async_update_sensors(
     assert not api._sensors_raw
 
     api._active_devices = [123]
-    api._devices = {123: {"deviceToken": "qwe"}}
-    api._sensors.setdefault(123, {})
+    api._devices = {123: {"deviceToken": "qwe", "pt_model": "JQ_300"}}
 
     ts_now = int(dt_util.now().timestamp())
     expected_data = {1: 0, 4: 25, 5: 37, 6: 39, 7: 0.023, 8: 0.521, 9: 421}
@@ -339,7 +844,7 @@ async def test_async_update_sensors(
     await api.async_update_sensors()
 
     assert aioclient_mock.call_count == 1
-    assert api._sensors == {123: {ts_now: expected_data}}
+    assert api._sensors[123].average(ts_now) == expected_data
     assert api._sensors_raw == {123: expected_data}
 
     await api.async_update_sensors()
@@ -347,6 +852,56 @@ async def test_async_update_sensors(
     assert aioclient_mock.call_count == 1
 
 
+async def test_async_update_sensors_concurrent(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+):
+    """Test devices sensors are fetched concurrently and independently."""
+    sensors_json = load_fixture("deviceSensors.json")
+    running = []
+    max_running = []
+
+    async def _list_response(method, url, data):
+        running.append(url)
+        max_running.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(url)
+        return AiohttpClientMockResponse(method, url, text=sensors_json)
+
+    aioclient_mock.get(
+        BASE_URL_DEVICE + "list",
+        params={"deviceToken": "t3"},
+        exc=asyncio.TimeoutError(),
+    )
+    aioclient_mock.get(BASE_URL_DEVICE + "list", side_effect=_list_response)
+
+    session = async_get_clientsession(hass)
+    api = Jq300Account(
+        hass, session, "test@email.com", "test_password", max_concurrent_queries=2
+    )
+
+    api._devices = {
+        dev_id: {"deviceToken": f"t{dev_id}", "pt_model": "JQ_300"}
+        for dev_id in range(6)
+    }
+    api._active_devices = list(api._devices)
+
+    await api.async_update_sensors()
+
+    # Timed out request is retried
+    calls = 5 + QUERY_RETRIES + 1
+    assert aioclient_mock.call_count == calls
+    assert max(max_running) == 2
+    assert sorted(api._sensors_raw) == [0, 1, 2, 4, 5]
+
+    # Failed device is not fetched again until poll interval passed
+    await api.async_update_sensors()
+    assert aioclient_mock.call_count == calls
+
+    api._sensors_polled[3] -= DEVICE_POLL_MIN_INTERVAL
+    await api.async_update_sensors()
+    assert aioclient_mock.call_count == calls + QUERY_RETRIES + 1
+
+
 async def test_async_update_sensors_pass(
     hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
 ):
@@ -361,14 +916,88 @@ async def test_async_update_sensors_pass(
     assert aioclient_mock.call_count == 0
     assert not api._sensors_raw
 
+    api._devices = {123: {"deviceToken": "qwe", "pt_model": "JQ_300"}}
     api._active_devices = [123]
-    api._sensors_raw = {123: "qwe"}
+    api.metrics.record_frame(123)
 
+    # Device receiving MQTT frames is not polled
     await api.async_update_sensors()
 
     assert aioclient_mock.call_count == 0
 
 
+async def test_async_update_sensors_stale(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+):
+    """Test stale devices are polled with growing interval."""
+    aioclient_mock.get(
+        BASE_URL_DEVICE + "list", text=load_fixture("deviceSensors.json")
+    )
+
+    session = async_get_clientsession(hass)
+    api = Jq300Account(hass, session, "test@email.com", "test_password")
+    api._devices = {123: {"deviceToken": "qwe", "pt_model": "JQ_300"}}
+    api._active_devices = [123]
+
+    now = monotonic()
+    with patch("custom_components.jq300.api.monotonic", return_value=now):
+        await api.async_update_sensors()
+        assert aioclient_mock.call_count == 1
+        assert api._poll_intervals[123] == DEVICE_POLL_MIN_INTERVAL
+
+    polls = []
+    for _ in range(30):
+        now += DEVICE_POLL_MIN_INTERVAL
+        with patch("custom_components.jq300.api.monotonic", return_value=now):
+            await api.async_update_sensors()
+        polls.append(aioclient_mock.call_count)
+
+    # Intervals between polls grow up to maximum
+    assert polls[:8] == [2, 2, 3, 3, 3, 3, 4, 4]
+    assert api._poll_intervals[123] == DEVICE_POLL_INTERVAL
+
+    # Interval is reset when MQTT frames are received again
+    api.metrics.record_frame(123)
+    await api.async_update_sensors()
+    assert 123 not in api._poll_intervals
+
+
+async def test_async_resync_sensors_on_reconnect(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+):
+    """Test all active devices are fetched after MQTT reconnection."""
+    aioclient_mock.get(
+        BASE_URL_DEVICE + "list", text=load_fixture("deviceSensors.json")
+    )
+
+    session = async_get_clientsession(hass)
+    api = Jq300Account(hass, session, "test@email.com", "test_password")
+    api._devices = {
+        dev_id: {"deviceToken": f"t{dev_id}", "pt_model": "JQ_300"}
+        for dev_id in range(3)
+    }
+    api._active_devices = list(api._devices)
+    for dev_id in api._devices:
+        api.metrics.record_frame(dev_id)
+    api.params["uid"] = 123
+
+    with patch(
+        "custom_components.jq300.transport.Jq300MqttTransport.async_start"
+    ), patch("custom_components.jq300.transport.mqtt.Client"):
+        api._mqtt_connect()
+
+        # Initial connection
+        api._mqtt._transport._connect_callback(False)
+        await hass.async_block_till_done()
+        assert aioclient_mock.call_count == 0
+
+        api._mqtt._transport._connect_callback(True)
+        await hass.async_block_till_done()
+        assert aioclient_mock.call_count == 3
+
+        await api.async_stop()
+
+
 async def test_async_update_sensors_or_timeout(mock_api, caplog):
     """Test update current states of all active devices for account."""
     caplog.set_level(logging.DEBUG)
@@ -0,0 +1,129 @@
+"""The test for the sensors averaging engine."""
+
+from datetime import timedelta
+import random
+from typing import Dict, Optional
+
+import pytest
+
+from custom_components.jq300.averager import SensorsAverager
+from custom_components.jq300.const import SENSORS_FILTER_FRAME
+
+
+def reference_average(
+    history: Dict[int, Dict[int, float]], ts_now: int
+) -> Optional[Dict[int, float]]:
+    """Calculate average values by integrating the whole history window."""
+    ts_overdue = ts_now - SENSORS_FILTER_FRAME.total_seconds()
+
+    ts_min = max(
+        list(filter(lambda x: x <= ts_overdue, history.keys())) or {ts_overdue}
+    )
+    history = {m_ts: val for m_ts, val in history.items() if m_ts >= ts_min}
+    if not history:
+        return None
+
+    res = {}
+    last_ts = ts_overdue
+    last_data: Dict[int, float] = {}
+    for sensor_id in list(history.values())[-1]:
+        res.setdefault(sensor_id, 0)
+        last_data.setdefault(sensor_id, 0)
+
+    for m_ts, data in history.items():
+        val_t = m_ts - last_ts
+        if val_t > 0:
+            for sensor_id, val in last_data.items():
+                res[sensor_id] += val * val_t
+        last_ts = max(m_ts, ts_overdue)
+        last_data = data
+
+    val_t = ts_now - last_ts + 1
+    for sensor_id, val in last_data.items():
+        res[sensor_id] += val * val_t
+
+    length = max(1, ts_now - max(min(history.keys()), ts_overdue) + 1)
+    return {sensor_id: val / length for sensor_id, val in res.items()}
+
+
+async def test_averager_basics():
+    """Test averager on simple cases."""
+    averager = SensorsAverager()
+
+    assert len(averager) == 0
+    assert averager.average(1000) is None
+
+    averager.add(1000, {8: 10})
+    assert len(averager) == 1
+    assert averager.average(1000) == {8: 10}
+    assert averager.average(5000) == {8: 10}
+
+    averager.add(1001, {8: 20})
+    assert averager.average(1001) == {8: 15}
+
+    # Same timestamp replaces last sample
+    averager.add(1001, {8: 30})
+    assert len(averager) == 2
+    assert averager.average(1001) == {8: 20}
+
+    # Expired samples are evicted, the last one before the window is kept
+    averager.add(2000, {8: 40})
+    assert len(averager) == 2
+    assert averager.average(2400) == {8: 40}
+    assert len(averager) == 1
+
+    averager.clear()
+    assert len(averager) == 0
+    assert averager.average(2000) is None
+
+
+async def test_averager_custom_frame():
+    """Test averager with custom window length."""
+    averager = SensorsAverager(timedelta(seconds=10))
+
+    averager.add(100, {9: 400})
+    averager.add(105, {9: 500})
+    assert averager.average(109) == {9: 450}
+    assert averager.average(115) == {9: 500}
+    assert len(averager) == 1
+
+
+@pytest.mark.parametrize("seed", range(20))
+async def test_averager_matches_reference(seed):
+    """Test averager gives the same results as full window integration."""
+    rnd = random.Random(seed)
+    averager = SensorsAverager()
+    history = {}
+
+    m_ts = 1_600_000_000
+    for _ in range(300):
+        m_ts += rnd.choice((0, 1, 1, 2, 5, 13, 60, 200, 400))
+        data = {sensor_id: rnd.randint(0, 3000) for sensor_id in (1, 4, 5, 6, 7, 8, 9)}
+        averager.add(m_ts, data)
+        history[m_ts] = data
+
+        # Integer values are summed exactly, so results must be identical
+        assert averager.average(m_ts) == reference_average(history, m_ts)
+
+        # Read again later, before the next sample arrives
+        m_ts += rnd.randint(0, 600)
+        assert averager.average(m_ts) == reference_average(history, m_ts)
+
+
+@pytest.mark.parametrize("seed", range(5))
+async def test_averager_matches_reference_float(seed):
+    """Test averager matches full window integration on float values."""
+    rnd = random.Random(seed)
+    averager = SensorsAverager()
+    history = {}
+
+    m_ts = 1_600_000_000
+    for _ in range(300):
+        m_ts += rnd.choice((1, 2, 5, 13, 60))
+        data = {7: rnd.uniform(0, 2), 8: rnd.uniform(0, 2) * 1000 * 24.45 / 30.026}
+        averager.add(m_ts, data)
+        history[m_ts] = data
+
+        assert averager.average(m_ts) == pytest.approx(
+            reference_average(history, m_ts), rel=1e-9
+        )
@@ -0,0 +1,84 @@
+# pylint: disable=protected-access,redefined-outer-name
+"""Benchmarks for the account hot paths.
+
+Benchmarks are run once as usual tests. To measure them use `bin/benchmark`.
+"""
+
+import json
+
+import pytest
+from pytest_homeassistant_custom_component.common import load_fixture
+
+from custom_components.jq300.api import Jq300Account
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+import homeassistant.util.dt as dt_util
+
+SENSORS_FRAME = json.loads(load_fixture("deviceSensors.json"))["deviceValueVos"]
+
+
+def make_account(hass: HomeAssistant, devices_num: int = 1) -> Jq300Account:
+    """Make account with a number of active devices."""
+    session = async_get_clientsession(hass)
+    api = Jq300Account(hass, session, "test@email.com", "test_password", True, True)
+    api._devices = {
+        dev_id: {"deviceToken": f"token{dev_id}", "pt_model": "JQ_300"}
+        for dev_id in range(devices_num)
+    }
+    api.active_devices = list(api._devices)
+    return api
+
+
+@pytest.mark.benchmark(group="extract_sensors_data")
+async def test_extract_sensors_data(hass: HomeAssistant, benchmark):
+    """Benchmark sensors data extraction from a frame."""
+    api = make_account(hass)
+    ts_now = int(dt_util.now().timestamp())
+
+    benchmark(api._extract_sensors_data, 0, ts_now, SENSORS_FRAME)
+
+    assert api.get_sensors_raw(0)
+
+
+@pytest.mark.benchmark(group="get_sensors")
+@pytest.mark.parametrize("interval", [1, 10, 60])
+async def test_get_sensors(hass: HomeAssistant, benchmark, interval: int):
+    """Benchmark reading averaged sensors values of 5-minute history."""
+    api = make_account(hass)
+    ts_now = int(dt_util.now().timestamp())
+    for m_ts in range(ts_now - 300, ts_now + 1, interval):
+        api._extract_sensors_data(0, m_ts, SENSORS_FRAME)
+
+    res = benchmark(api.get_sensors, 0)
+
+    assert res
+
+
+@pytest.mark.benchmark(group="mqtt_process_message")
+@pytest.mark.parametrize("devices_num", [10, 100, 1000])
+async def test_mqtt_process_message(hass: HomeAssistant, benchmark, devices_num: int):
+    """Benchmark MQTT message processing with a number of devices."""
+    api = make_account(hass, devices_num)
+    dev_id = devices_num // 2
+    message = {
+        "deviceToken": f"token{dev_id}",
+        "type": "V",
+        "content": json.dumps(SENSORS_FRAME),
+    }
+
+    benchmark(api._mqtt_process_message, message)
+
+    assert api.get_sensors_raw(dev_id)
+
+
+@pytest.mark.benchmark(group="decode_response")
+@pytest.mark.parametrize("jsonp", [False, True], ids=["json", "jsonp"])
+async def test_decode_response(benchmark, jsonp: bool):
+    """Benchmark cloud response decoding."""
+    content = load_fixture("deviceSensors.json").encode()
+    if jsonp:
+        content = b"jsoncallback(" + content + b")"
+
+    res = benchmark(Jq300Account._decode_response, content)
+
+    assert res["deviceValueVos"] == SENSORS_FRAME
@@ -1,15 +1,21 @@
 # pylint: disable=protected-access,redefined-outer-name
 """The test for the binary sensor platform."""
 
-from custom_components.jq300 import Jq300Account
+from pytest_homeassistant_custom_component.common import mock_restore_cache
+
+from custom_components.jq300 import Jq300Account, Jq300DataUpdateCoordinator
 from custom_components.jq300.binary_sensor import Jq300BinarySensor
+from homeassistant.const import STATE_ON, STATE_UNAVAILABLE
+from homeassistant.core import HomeAssistant, State
 
 
-async def test_entity_initialization(mock_account: Jq300Account):
+async def test_entity_initialization(
+    mock_coordinator: Jq300DataUpdateCoordinator, mock_account: Jq300Account
+):
     """Test entity initialization."""
     mock_account._devices = {123: {"pt_name": "Kitchen"}}
 
-    entity = Jq300BinarySensor("test", mock_account, 123, 1, False)
+    entity = Jq300BinarySensor("test", mock_coordinator, 123, 1, False)
 
     assert entity.name == "Kitchen Air Quality Alert"
     assert entity.icon == "mdi:alert"
@@ -17,13 +23,41 @@ async def test_entity_initialization(mock_account: Jq300Account):
 
     assert entity.is_on is False
 
-    entity.update()
+    entity._update_state()
     assert entity.is_on is False
 
-    mock_account._sensors_raw[123] = {1: False}
-    entity.update()
+    mock_coordinator.data = {123: {1: False}}
+    entity._update_state()
     assert entity.is_on is False
 
-    mock_account._sensors_raw[123] = {1: True}
-    entity.update()
+    mock_coordinator.data = {123: {1: True}}
+    entity._update_state()
+    assert entity.is_on is True
+
+
+async def test_entity_restore_state(
+    hass: HomeAssistant,
+    mock_coordinator: Jq300DataUpdateCoordinator,
+    mock_account: Jq300Account,
+):
+    """Test entity restores last state until data is received."""
+    mock_account._devices = {123: {"pt_name": "Kitchen"}}
+    mock_restore_cache(
+        hass,
+        [
+            State("binary_sensor.test", STATE_ON),
+            State("binary_sensor.test2", STATE_UNAVAILABLE),
+        ],
+    )
+
+    entity = Jq300BinarySensor("binary_sensor.test", mock_coordinator, 123, 1, None)
+    entity.hass = hass
+    assert entity.is_on is None
+
+    await entity.async_added_to_hass()
     assert entity.is_on is True
+
+    entity = Jq300BinarySensor("binary_sensor.test2", mock_coordinator, 123, 1, None)
+    entity.hass = hass
+    await entity.async_added_to_hass()
+    assert entity.is_on is None
@@ -0,0 +1,58 @@
+"""The test for the cloud queries circuit breaker."""
+
+from time import monotonic
+from unittest.mock import patch
+
+from custom_components.jq300.breaker import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+    backoff_delay,
+)
+
+
+async def test_backoff_delay():
+    """Test backoff delay calculation."""
+    for attempt in range(10):
+        delay = backoff_delay(attempt, 1, 30)
+        assert 0 <= delay <= min(30, 2**attempt)
+
+
+async def test_circuit_breaker():
+    """Test circuit breaker states."""
+    breaker = CircuitBreaker(3, 60)
+
+    assert breaker.state == STATE_CLOSED
+    assert breaker.allow_request() is True
+
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == STATE_CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+    assert breaker.allow_request() is False
+
+    with patch(
+        "custom_components.jq300.breaker.monotonic", return_value=monotonic() + 60
+    ):
+        assert breaker.state == STATE_HALF_OPEN
+        assert breaker.allow_request() is True
+        # Only one trial request is allowed
+        assert breaker.allow_request() is False
+
+        # Failed trial opens circuit again
+        breaker.record_failure()
+        assert breaker.state == STATE_OPEN
+
+    with patch(
+        "custom_components.jq300.breaker.monotonic", return_value=monotonic() + 120
+    ):
+        assert breaker.allow_request() is True
+        breaker.record_success()
+        assert breaker.state == STATE_CLOSED
+        assert breaker.allow_request() is True
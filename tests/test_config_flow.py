@@ -2,15 +2,28 @@
 
 from unittest.mock import patch
 
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
 from custom_components.jq300 import DOMAIN
-from custom_components.jq300.config_flow import Jq300FlowHandler
+from custom_components.jq300.util import mask_email
 from homeassistant import config_entries, data_entry_flow
+from homeassistant.const import CONF_USERNAME
 from homeassistant.core import HomeAssistant
 
+from tests.const import MOCK_USERNAME
+
+
+@pytest.fixture(autouse=True)
+def skip_setup():
+    """Skip setup of created entries."""
+    with patch("custom_components.jq300.async_setup_entry", return_value=True):
+        yield
+
 
 async def test_async_step_import(hass: HomeAssistant):
     """Test a successful config flow import."""
-    config = {"some": "data"}
+    config = {CONF_USERNAME: MOCK_USERNAME}
     result = await hass.config_entries.flow.async_init(
         DOMAIN,
         context={"source": config_entries.SOURCE_IMPORT},
@@ -18,15 +31,41 @@ async def test_async_step_import(hass: HomeAssistant):
     )
 
     assert result["type"] == data_entry_flow.RESULT_TYPE_CREATE_ENTRY
+    assert result["title"] == mask_email(MOCK_USERNAME)
     assert result["data"] == config
+    assert result["result"].unique_id == MOCK_USERNAME
+
+    # Same account is imported only once
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN,
+        context={"source": config_entries.SOURCE_IMPORT},
+        data=config,
+    )
+    assert result["type"] == data_entry_flow.RESULT_TYPE_ABORT
+    assert result["reason"] == "already_configured"
+
+    # Another account gets its own entry
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN,
+        context={"source": config_entries.SOURCE_IMPORT},
+        data={CONF_USERNAME: "other@email.com"},
+    )
+    assert result["type"] == data_entry_flow.RESULT_TYPE_CREATE_ENTRY
+    assert len(hass.config_entries.async_entries(DOMAIN)) == 2
+
 
-    with patch.object(
-        Jq300FlowHandler, "_async_current_entries", return_value=["Test"]
-    ):
-        result = await hass.config_entries.flow.async_init(
-            DOMAIN,
-            context={"source": config_entries.SOURCE_IMPORT},
-            data=config,
-        )
+async def test_async_step_import_legacy(hass: HomeAssistant):
+    """Test import adopts entry created for single account."""
+    entry = MockConfigEntry(domain=DOMAIN, source=config_entries.SOURCE_IMPORT, data={})
+    entry.add_to_hass(hass)
+
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN,
+        context={"source": config_entries.SOURCE_IMPORT},
+        data={CONF_USERNAME: MOCK_USERNAME},
+    )
 
-        assert result["type"] == data_entry_flow.RESULT_TYPE_ABORT
+    assert result["type"] == data_entry_flow.RESULT_TYPE_ABORT
+    assert entry.unique_id == MOCK_USERNAME
+    assert entry.data == {CONF_USERNAME: MOCK_USERNAME}
+    assert len(hass.config_entries.async_entries(DOMAIN)) == 1
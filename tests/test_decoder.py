@@ -0,0 +1,64 @@
+# pylint: disable=protected-access
+"""The test for the sensors values decoder."""
+
+import json
+
+from pytest_homeassistant_custom_component.common import load_fixture
+
+from custom_components.jq300.api import Jq300Account
+from custom_components.jq300.const import MODEL_DEFAULT_SENSORS, MODELS
+from custom_components.jq300.decoder import SensorsDecoder
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+SENSORS_FRAME = json.loads(load_fixture("deviceSensors.json"))["deviceValueVos"]
+UNITS = {1: None, 4: "°C", 5: "%", 6: "µg/m³", 7: "mg/m³", 8: "ppb", 9: "ppm"}
+
+
+def test_decode():
+    """Test decoding of sensors values."""
+    decoder = SensorsDecoder(MODELS["JQ_300"], UNITS)
+
+    assert decoder.sensors == (1, 4, 5, 6, 7, 8, 9)
+    assert decoder.decode(
+        [
+            {"seq": 1, "content": "1"},
+            {"seq": 2, "content": "12"},
+            {"seq": 4, "content": "25.6"},
+            {"seq": 6, "content": None},
+            {"seq": 7, "content": "0.012"},
+            {"seq": 8, "content": "0.1"},
+            {"seq": 9, "content": ""},
+        ]
+    ) == {1: 1, 4: 25, 7: 0.012, 8: 24}
+
+
+def test_decode_models():
+    """Test only sensors supported by model are decoded."""
+    decoder = SensorsDecoder(MODELS["JQ300"], UNITS)
+    assert set(decoder.decode(SENSORS_FRAME)) == {1, 4, 5, 7, 8, 9}
+
+    decoder = SensorsDecoder(MODEL_DEFAULT_SENSORS, UNITS)
+    assert set(decoder.decode(SENSORS_FRAME)) == {1, 7, 8, 9}
+
+
+async def test_device_decoder(hass: HomeAssistant):
+    """Test decoders are shared by devices of the same model."""
+    session = async_get_clientsession(hass)
+    api = Jq300Account(hass, session, "test@email.com", "test_password")
+    api._set_devices(
+        [
+            {"deviceid": 1, "pt_model": "JQ_300"},
+            {"deviceid": 2, "pt_model": "JQ_300"},
+            {"deviceid": 3, "pt_model": "unknown"},
+        ]
+    )
+
+    assert api.get_device_decoder(1) is api.get_device_decoder(2)
+    assert api.get_device_decoder(1).sensors == MODELS["JQ_300"]
+    assert api.get_device_decoder(3).sensors == MODEL_DEFAULT_SENSORS
+    assert api.get_device_decoder(4).sensors == MODEL_DEFAULT_SENSORS
+
+    # Decoder is rebuilt when device model is changed
+    api._set_devices([{"deviceid": 3, "pt_model": "JQ300"}])
+    assert api.get_device_decoder(3).sensors == MODELS["JQ300"]
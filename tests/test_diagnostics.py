@@ -0,0 +1,53 @@
+# pylint: disable=protected-access,redefined-outer-name
+"""The test for the config entry diagnostics."""
+
+import json
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.jq300.averager import SensorsAverager
+from custom_components.jq300.const import CONF_ACCOUNT_CONTROLLER, DOMAIN
+from custom_components.jq300.diagnostics import async_get_config_entry_diagnostics
+from homeassistant.core import HomeAssistant
+
+from tests.const import MOCK_CONFIG
+
+
+async def test_diagnostics(hass: HomeAssistant, mock_account):
+    """Test diagnostics snapshot."""
+    entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+
+    hass.data[DOMAIN] = {}
+    res = await async_get_config_entry_diagnostics(hass, entry)
+    assert res == {
+        "config": {
+            "username": "te*t@em**l.com",
+            "password": "**REDACTED**",
+            "devices": ["test_name"],
+        }
+    }
+
+    mock_account._devices = {
+        123: {"deviceToken": "26E84E117417B97BA417", "pt_name": "Kitchen"}
+    }
+    mock_account.active_devices = [123]
+    mock_account._sensors[123] = SensorsAverager()
+    mock_account._sensors[123].add(1000, {8: 10})
+    mock_account._sensors[123].add(1001, {8: 20})
+    hass.data[DOMAIN][entry.entry_id] = {CONF_ACCOUNT_CONTROLLER: mock_account}
+
+    res = await async_get_config_entry_diagnostics(hass, entry)
+
+    # Credentials are not leaked
+    dump = json.dumps(res)
+    assert "test@email.com" not in dump
+    assert "test_password" not in dump
+
+    assert res["account"] == "te*t@em**l.com"
+    assert res["connection"] == {"connected": False, "available": False}
+    assert res["mqtt"]["started"] is False
+    assert res["throttle"]["circuit_breaker"] == "closed"
+    assert res["devices"][123]["name"] == "Kitchen"
+    assert res["devices"][123]["samples"] == 2
+    assert res["devices"][123]["samples_memory"] > 0
+    assert res["memory"]["samples"] == res["devices"][123]["samples_memory"]
@@ -1,24 +1,26 @@
 # pylint: disable=protected-access,redefined-outer-name
 """The test for the entity."""
 
+from unittest.mock import patch
+
 from pytest import raises
 
-from custom_components.jq300 import Jq300Account
+from custom_components.jq300 import Jq300Account, Jq300DataUpdateCoordinator
 from custom_components.jq300.const import ATTRIBUTION, DOMAIN
 from custom_components.jq300.entity import Jq300Entity
 from homeassistant.exceptions import PlatformNotReady
 
 
-async def test_entity_initialization(mock_account: Jq300Account):
+async def test_entity_initialization(mock_coordinator: Jq300DataUpdateCoordinator):
     """Test entity initialization."""
     with raises(PlatformNotReady):
-        _ = Jq300Entity("test", mock_account, 123, 7, 12)
+        _ = Jq300Entity("test", mock_coordinator, 123, 7, 12)
 
-    mock_account._devices = {
+    mock_coordinator.account._devices = {
         123: {"pt_name": "Kitchen", "brandname": "qwe", "pt_model": "asd"}
     }
 
-    entity = Jq300Entity("test", mock_account, 123, 7, 12)
+    entity = Jq300Entity("test", mock_coordinator, 123, 7, 12)
 
     expected_device_info = {
         "identifiers": {(DOMAIN, "test@email.com", 123)},
@@ -34,7 +36,58 @@ async def test_entity_initialization(mock_account: Jq300Account):
     assert entity.name is None
     assert entity.icon is None
     assert entity.available is False
-    assert entity.should_poll is True
+    assert entity.should_poll is False
     assert entity.device_class is None
     assert entity.device_info == expected_device_info
     assert entity.extra_state_attributes == expected_attributes
+
+
+async def test_entity_coordinator_update(
+    mock_coordinator: Jq300DataUpdateCoordinator, mock_account: Jq300Account
+):
+    """Test entity writes its state only when something changed."""
+    mock_account._devices = {123: {"pt_name": "Kitchen"}}
+
+    entity = Jq300Entity("sensor.test", mock_coordinator, 123, 7, 12)
+
+    with patch.object(
+        entity, "_update_state", return_value=False
+    ) as update_state, patch.object(entity, "async_write_ha_state") as write_state:
+        # First update writes availability
+        entity._handle_coordinator_update()
+        assert update_state.call_count == 1
+        assert write_state.call_count == 1
+
+        entity._handle_coordinator_update()
+        assert update_state.call_count == 2
+        assert write_state.call_count == 1
+
+        update_state.return_value = True
+        entity._handle_coordinator_update()
+        assert write_state.call_count == 2
+
+
+async def test_entity_availability_update(
+    mock_coordinator: Jq300DataUpdateCoordinator, mock_account: Jq300Account
+):
+    """Test entity writes its state only when availability flips."""
+    mock_account._devices = {123: {"pt_name": "Kitchen"}}
+
+    entity = Jq300Entity("sensor.test", mock_coordinator, 123, 7, 12)
+    entity._last_available = False
+
+    with patch.object(entity, "async_write_ha_state") as write_state:
+        entity._handle_availability_update()
+        assert write_state.call_count == 0
+
+        mock_account._available[123] = True
+        entity._handle_availability_update()
+        assert write_state.call_count == 1
+        assert entity._last_available is True
+
+        entity._handle_availability_update()
+        assert write_state.call_count == 1
+
+    # Failed cloud poll does not hide data of online device
+    mock_coordinator.last_update_success = False
+    assert entity.available is True
@@ -0,0 +1,57 @@
+"""The test for the integration import time."""
+
+import json
+import subprocess
+import sys
+
+# Home Assistant modules which are always loaded before the integration
+PRELOADED = (
+    "homeassistant.config_entries",
+    "homeassistant.core",
+    "homeassistant.helpers.aiohttp_client",
+    "homeassistant.helpers.config_validation",
+    "homeassistant.helpers.storage",
+    "homeassistant.helpers.update_coordinator",
+)
+
+# Modules which must be loaded only when they are really needed
+LAZY = (
+    "paho.mqtt.client",
+    "homeassistant.components.binary_sensor",
+    "homeassistant.components.sensor",
+)
+
+MAX_IMPORT_TIME = 0.5  # seconds
+
+SCRIPT = f"""
+import json
+import sys
+from time import perf_counter
+
+for module in {PRELOADED!r}:
+    __import__(module)
+
+start = perf_counter()
+import custom_components.jq300
+duration = perf_counter() - start
+
+print(json.dumps({{
+    "duration": duration,
+    "loaded": [x for x in {LAZY!r} if x in sys.modules],
+}}))
+"""
+
+
+def test_import_time():
+    """Test integration is imported fast and without heavy dependencies."""
+    res = subprocess.run(
+        [sys.executable, "-c", SCRIPT],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    data = json.loads(res.stdout.splitlines()[-1])
+
+    print(f"Import time of custom_components.jq300: {data['duration']:.4f} s")
+    assert data["loaded"] == []
+    assert data["duration"] < MAX_IMPORT_TIME
@@ -0,0 +1,66 @@
+# pylint: disable=protected-access,redefined-outer-name
+"""The test for the ingestion queue."""
+
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.jq300.ingest import Jq300IngestQueue
+from homeassistant.core import HomeAssistant
+import homeassistant.util.dt as dt_util
+
+
+async def test_ingest_queue_coalescing(hass: HomeAssistant):
+    """Test messages are coalesced by device and type."""
+    process_batch = MagicMock()
+    queue = Jq300IngestQueue(hass, process_batch)
+
+    queue.async_put({"deviceToken": "qwe", "type": "V", "content": "1"})
+    queue.async_put({"deviceToken": "qwe", "type": "C", "content": "1"})
+    queue.async_put({"deviceToken": "qwe", "type": "V", "content": "2"})
+    queue.async_put({"deviceToken": "asd", "type": "V", "content": "3"})
+
+    assert len(queue) == 3
+    assert queue.received == 4
+    assert queue.coalesced == 1
+    assert process_batch.call_count == 0
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=1))
+    await hass.async_block_till_done()
+
+    process_batch.assert_called_once_with(
+        [
+            {"deviceToken": "qwe", "type": "V", "content": "2"},
+            {"deviceToken": "qwe", "type": "C", "content": "1"},
+            {"deviceToken": "asd", "type": "V", "content": "3"},
+        ]
+    )
+    assert len(queue) == 0
+
+    # Empty queue is not processed
+    queue.async_flush()
+    assert process_batch.call_count == 1
+
+
+async def test_ingest_queue_backpressure(hass: HomeAssistant):
+    """Test messages are dropped when queue is full."""
+    process_batch = MagicMock()
+    queue = Jq300IngestQueue(hass, process_batch, max_size=2)
+
+    for token in ("qwe", "asd", "zxc", "qwe"):
+        queue.async_put({"deviceToken": token, "type": "V"})
+
+    assert len(queue) == 2
+    assert queue.dropped == 1
+    assert queue.coalesced == 1
+
+    queue.async_flush()
+    process_batch.assert_called_once_with(
+        [{"deviceToken": "qwe", "type": "V"}, {"deviceToken": "asd", "type": "V"}]
+    )
+
+    # Pending flush timer was cancelled
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=1))
+    await hass.async_block_till_done()
+    assert process_batch.call_count == 1
@@ -0,0 +1,74 @@
+"""The test for the runtime performance metrics."""
+
+from unittest.mock import patch
+
+from custom_components.jq300.metrics import Histogram, Jq300Metrics, RateMeter
+
+
+async def test_histogram():
+    """Test histogram of durations."""
+    hist = Histogram()
+    assert hist.mean == 0
+    assert hist.percentile(0.95) == 0
+    assert hist.as_dict() == {"count": 0, "mean": 0, "p95": 0, "max": 0}
+
+    for _ in range(95):
+        hist.add(0.002)
+    for _ in range(5):
+        hist.add(0.3)
+
+    assert hist.count == 100
+    assert hist.max == 0.3
+    assert round(hist.mean, 4) == 0.0169
+    assert hist.percentile(0.5) == 0.0025
+    assert hist.percentile(0.95) == 0.0025
+    assert hist.percentile(0.99) == 0.3
+
+    # Values over the last bucket
+    hist.add(20)
+    assert hist.percentile(1) == 20
+
+
+async def test_rate_meter():
+    """Test rate of events."""
+    with patch("custom_components.jq300.metrics.monotonic", return_value=1000):
+        meter = RateMeter(10)
+
+    for tstamp in range(1000, 1010):
+        meter.add(tstamp)
+        meter.add(tstamp + 0.5)
+
+    assert meter.rate(1009) == 20 / 9
+    # Old events are out of window
+    assert meter.rate(1010) == 18 / 10
+    assert meter.rate(1015) == 8 / 10
+    assert meter.rate(1030) == 0
+
+    # Rate is calculated for time passed since start if it shorter than window
+    with patch("custom_components.jq300.metrics.monotonic", return_value=1000):
+        meter = RateMeter(10)
+    meter.add(1000)
+    meter.add(1001)
+    assert meter.rate(1002) == 1
+
+
+async def test_metrics():
+    """Test account metrics."""
+    metrics = Jq300Metrics()
+
+    metrics.record_query("func", 0.1, True)
+    metrics.record_query("func", 0.3, False)
+    assert metrics.queries["func"].count == 2
+    assert metrics.query_errors == {"func": 1}
+
+    metrics.record_message()
+    assert metrics.messages_total == 1
+    assert metrics.decode.count == 0
+    metrics.record_decode(0.001)
+    assert metrics.decode.count == 1
+
+    assert metrics.frame_age(123) is None
+    with patch("custom_components.jq300.metrics.monotonic", return_value=1000):
+        metrics.record_frame(123)
+    with patch("custom_components.jq300.metrics.monotonic", return_value=1030):
+        assert metrics.frame_age(123) == 30
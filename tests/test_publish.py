@@ -0,0 +1,39 @@
+"""The test for the sensor state writes filter."""
+
+from custom_components.jq300.publish import PublishFilter
+
+
+def test_publish_filter_default():
+    """Test every change is published by default."""
+    publish = PublishFilter.from_config(None)
+
+    assert publish.should_publish(1, None, 0) is True
+    publish.mark_published(0)
+    assert publish.should_publish(1.001, 1, 0) is True
+    assert publish.should_publish(1, 1, 0) is True
+
+
+def test_publish_filter_deadband():
+    """Test absolute and relative deadbands."""
+    publish = PublishFilter(deadband=0.5)
+    publish.mark_published(0)
+    assert publish.should_publish(10.4, 10, 1) is False
+    assert publish.should_publish(9.5, 10, 1) is True
+
+    publish = PublishFilter(deadband_percent=10)
+    publish.mark_published(0)
+    assert publish.should_publish(109, 100, 1) is False
+    assert publish.should_publish(89, 100, 1) is True
+    assert publish.should_publish(1, 0, 1) is True
+
+
+def test_publish_filter_intervals():
+    """Test minimal interval and heartbeat."""
+    publish = PublishFilter(deadband=5, min_interval=60, heartbeat=900)
+    publish.mark_published(1000)
+
+    assert publish.should_publish(100, 10, 1059) is False
+    assert publish.should_publish(100, 10, 1060) is True
+    assert publish.should_publish(11, 10, 1899) is False
+    # Suppressed change is published on heartbeat
+    assert publish.should_publish(11, 10, 1900) is True
@@ -0,0 +1,48 @@
+"""The test for the multi-resolution rollups of sensors values."""
+
+from datetime import timedelta
+
+from custom_components.jq300.const import ROLLUP_TIERS
+from custom_components.jq300.rollup import SensorsRollup
+
+
+def test_rollup_stats():
+    """Test statistics of sensors values."""
+    rollup = SensorsRollup()
+    assert len(rollup) == 0
+    assert rollup.stats(1, timedelta(hours=1), 10000) is None
+
+    ts_now = 36000
+    rollup.add(ts_now - 100, {1: 4, 2: 10})
+    rollup.add(ts_now - 90, {1: 2})
+    rollup.add(ts_now, {1: 6})
+
+    assert rollup.stats(1, timedelta(hours=1), ts_now) == (2, 6, 4)
+    assert rollup.stats(2, timedelta(hours=1), ts_now) == (10, 10, 10)
+    assert rollup.stats(3, timedelta(hours=1), ts_now) is None
+
+    # Values out of horizon are not counted
+    assert rollup.stats(1, timedelta(minutes=1), ts_now) == (6, 6, 6)
+    assert rollup.stats(1, timedelta(hours=1), ts_now + 7200) is None
+
+    # Out of order sample is counted in the last bucket
+    rollup.add(ts_now - 1000, {1: 0})
+    assert rollup.stats(1, timedelta(minutes=1), ts_now) == (0, 6, 3)
+
+
+def test_rollup_tiers():
+    """Test statistics are read from the finest tier covering horizon."""
+    rollup = SensorsRollup()
+
+    # One sample per minute for 48 hours
+    for i in range(48 * 60):
+        rollup.add(i * 60, {1: i})
+    ts_now = (48 * 60 - 1) * 60
+
+    # 1 hour is covered by 1-minute buckets
+    assert rollup.stats(1, timedelta(hours=1), ts_now) == (2820, 2879, 2849.5)
+    # 24 hours are covered by 15-minutes buckets
+    assert rollup.stats(1, timedelta(hours=24), ts_now) == (1440, 2879, 2159.5)
+
+    # Memory is bounded by number of buckets of all tiers
+    assert len(rollup) == sum(size for _, size in ROLLUP_TIERS)
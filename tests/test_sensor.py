@@ -1,23 +1,42 @@
 # pylint: disable=protected-access,redefined-outer-name
 """The test for the sensor platform."""
 
-from custom_components.jq300 import Jq300Account
-from custom_components.jq300.const import ATTRIBUTION
-from custom_components.jq300.sensor import Jq300Sensor
-from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import (
+    mock_restore_cache_with_extra_data,
+)
+
+from custom_components.jq300 import Jq300Account, Jq300DataUpdateCoordinator
+from custom_components.jq300.averager import SensorsAverager
+from custom_components.jq300.const import (
+    ATTRIBUTION,
+    METRIC_DROPPED_FRAMES,
+    METRIC_QUERY_LATENCY,
+)
+from custom_components.jq300.rollup import SensorsRollup
+from custom_components.jq300.sensor import (
+    Jq300MetricSensor,
+    Jq300RawSensor,
+    Jq300Sensor,
+    Jq300StatisticsSensor,
+)
+from homeassistant.components.sensor import SensorStateClass
+from homeassistant.core import HomeAssistant, State
 import homeassistant.util.dt as dt_util
 
 
-async def test_entity_initialization(hass: HomeAssistant, mock_account: Jq300Account):
+async def test_entity_initialization(
+    hass: HomeAssistant,
+    mock_coordinator: Jq300DataUpdateCoordinator,
+    mock_account: Jq300Account,
+):
     """Test entity initialization."""
     mock_account._devices = {123: {"pt_name": "Kitchen"}}
 
-    entity = Jq300Sensor("test", mock_account, 123, 7, 12)
+    entity = Jq300Sensor("test", mock_coordinator, 123, 7, 12)
     entity.hass = hass
 
     expected_attributes = {
         "attribution": ATTRIBUTION,
-        "raw_state": 12,
     }
 
     assert entity.name == "Kitchen HCHO"
@@ -28,21 +47,161 @@ async def test_entity_initialization(hass: HomeAssistant, mock_account: Jq300Acc
     assert entity.state == 12
     assert entity.unit_of_measurement == "ppb"
 
-    entity.update()
+    entity._update_state()
     assert entity.state == 12
 
     ts_now = int(dt_util.now().timestamp())
 
     data = {7: 12}
-    mock_account._sensors[123][ts_now] = data
+    mock_account._sensors[123] = SensorsAverager()
+    mock_account._sensors[123].add(ts_now, data)
     mock_account._sensors_raw[123] = data
+    mock_coordinator.async_handle_device_update(123)
     #
-    entity.update()
+    entity._update_state()
     assert entity.state == 12
 
     data = {7: 23}
-    mock_account._sensors[123][ts_now] = data
+    mock_account._sensors[123].add(ts_now, data)
     mock_account._sensors_raw[123] = data
+    mock_coordinator.async_handle_device_update(123)
     #
-    entity.update()
+    entity._update_state()
     assert entity.state == 23
+
+
+async def test_entity_restore_state(
+    hass: HomeAssistant,
+    mock_coordinator: Jq300DataUpdateCoordinator,
+    mock_account: Jq300Account,
+):
+    """Test entity restores last state until data is received."""
+    mock_account._devices = {123: {"pt_name": "Kitchen"}}
+    mock_restore_cache_with_extra_data(
+        hass,
+        [
+            (
+                State("sensor.test", "34"),
+                {"native_value": 34, "native_unit_of_measurement": "ppb"},
+            )
+        ],
+    )
+
+    entity = Jq300Sensor("sensor.test", mock_coordinator, 123, 7, None)
+    entity.hass = hass
+    assert entity.state is None
+
+    await entity.async_added_to_hass()
+    assert entity.state == 34
+
+    # Known state is not overridden
+    entity = Jq300Sensor("sensor.test", mock_coordinator, 123, 7, 12)
+    entity.hass = hass
+    await entity.async_added_to_hass()
+    assert entity.state == 12
+
+
+async def test_entity_publish_filter(
+    hass: HomeAssistant,
+    mock_coordinator: Jq300DataUpdateCoordinator,
+    mock_account: Jq300Account,
+):
+    """Test small changes of state are not written."""
+    mock_account._devices = {123: {"pt_name": "Kitchen"}}
+
+    entity = Jq300Sensor(
+        "sensor.test", mock_coordinator, 123, 9, None, {"deadband": 10}
+    )
+    entity.hass = hass
+
+    ts_now = int(dt_util.now().timestamp())
+    mock_account._sensors[123] = SensorsAverager()
+    for value, expected in ((400, 400), (405, 400), (409, 400), (410, 410)):
+        data = {9: value}
+        mock_account._sensors[123].add(ts_now, data)
+        mock_account._sensors_raw[123] = data
+        mock_coordinator.async_handle_device_update(123)
+
+        entity._update_state()
+        assert entity.state == expected
+
+
+async def test_raw_sensor(
+    hass: HomeAssistant,
+    mock_coordinator: Jq300DataUpdateCoordinator,
+    mock_account: Jq300Account,
+):
+    """Test companion sensor of raw value."""
+    mock_account._devices = {123: {"pt_name": "Kitchen"}}
+
+    entity = Jq300RawSensor("sensor.test", mock_coordinator, 123, 9)
+    entity.hass = hass
+
+    assert entity.name == "Kitchen eCO2 Raw"
+    assert entity.unique_id == "test@email.com-123-9-raw"
+    assert entity.entity_registry_enabled_default is False
+    assert entity.state_class is None
+    assert entity.state is None
+    assert entity._update_state() is False
+
+    mock_account._sensors_raw[123] = {9: 412}
+    assert entity._update_state() is True
+    assert entity.state == 412
+    assert entity.extra_state_attributes == {"attribution": ATTRIBUTION}
+    assert entity._update_state() is False
+
+
+async def test_statistics_sensor(
+    hass: HomeAssistant,
+    mock_coordinator: Jq300DataUpdateCoordinator,
+    mock_account: Jq300Account,
+):
+    """Test long-horizon statistics sensor."""
+    mock_account._devices = {123: {"pt_name": "Kitchen"}}
+
+    entity = Jq300StatisticsSensor("sensor.test", mock_coordinator, 123, 4, "24h")
+    entity.hass = hass
+
+    assert entity.name == "Kitchen Internal Temperature 24h"
+    assert entity.unique_id == "test@email.com-123-4-24h"
+    assert entity.entity_registry_enabled_default is False
+    assert entity.state is None
+    assert entity._update_state() is False
+
+    ts_now = int(dt_util.now().timestamp())
+    rollup = mock_account._rollups[123] = SensorsRollup()
+    rollup.add(ts_now - 7200, {4: 18.0})
+    rollup.add(ts_now - 60, {4: 22.25})
+    rollup.add(ts_now, {4: 23.0})
+
+    assert entity._update_state() is True
+    assert entity.state == 21.1
+    assert entity.extra_state_attributes["min_value"] == 18.0
+    assert entity.extra_state_attributes["max_value"] == 23.0
+    assert entity._update_state() is False
+
+    entity = Jq300StatisticsSensor("sensor.test", mock_coordinator, 123, 4, "1h")
+    entity.hass = hass
+    assert entity.state == 22.6
+    assert entity.extra_state_attributes["min_value"] == 22.2
+
+
+async def test_metric_sensor(hass: HomeAssistant, mock_account: Jq300Account):
+    """Test diagnostic metric sensor."""
+    entity = Jq300MetricSensor("sensor.test", mock_account, METRIC_DROPPED_FRAMES)
+    entity.hass = hass
+
+    assert entity.name == "te*t@em**l.com Dropped Frames"
+    assert entity.unique_id == "test@email.com-dropped_frames"
+    assert entity.entity_registry_enabled_default is False
+    assert entity.entity_category == "diagnostic"
+    assert entity.should_poll is True
+    assert entity.state_class == SensorStateClass.TOTAL_INCREASING
+
+    mock_account.metrics.dropped_unknown = 3
+    await entity.async_update()
+    assert entity.state == 3
+    assert entity.extra_state_attributes["unknown_token"] == 3
+
+    entity = Jq300MetricSensor("sensor.test", mock_account, METRIC_QUERY_LATENCY)
+    assert entity.state_class == SensorStateClass.MEASUREMENT
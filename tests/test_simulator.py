@@ -0,0 +1,186 @@
+# pylint: disable=protected-access,redefined-outer-name
+"""End-to-end tests with local cloud simulator.
+
+Fleet size and load can be changed by environment variables to reproduce
+production load locally, e.g.:
+JQ300_SIM_DEVICES=500 JQ300_SIM_RATE=1 JQ300_SIM_DURATION=30 pytest -s tests/test_simulator.py
+"""
+
+import asyncio
+import os
+from unittest.mock import patch
+
+import async_timeout
+import pytest
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components.jq300.const import (
+    CONF_ACCOUNT_CONTROLLER,
+    CONF_COORDINATOR,
+    DISCOVERY_INTERVAL,
+    DOMAIN,
+    METRIC_QUERY_LATENCY,
+)
+from custom_components.jq300.sensor import Jq300RawSensor
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME, STATE_ON, STATE_UNKNOWN
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+import homeassistant.util.dt as dt_util
+
+from tests.const import MOCK_PASSWORD, MOCK_USERNAME
+from tests.simulator import CloudSimulator, async_measure_load
+
+SIM_DEVICES = int(os.environ.get("JQ300_SIM_DEVICES", 5))
+SIM_RATE = float(os.environ.get("JQ300_SIM_RATE", 1))
+SIM_DURATION = float(os.environ.get("JQ300_SIM_DURATION", 2))
+
+
+@pytest.fixture
+async def simulator(socket_enabled):
+    """Run cloud simulator."""
+    simulator = CloudSimulator(SIM_DEVICES)
+    await simulator.async_start()
+    # Latency is measured by raw value entities, so they are enabled
+    with simulator.patch_api(), patch.object(
+        Jq300RawSensor, "_attr_entity_registry_enabled_default", True
+    ):
+        yield simulator
+    await simulator.async_stop()
+
+
+async def _async_wait_for(condition, timeout: float = 10) -> None:
+    """Wait until condition is met."""
+    async with async_timeout.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.05)
+
+
+async def test_end_to_end(hass: HomeAssistant, simulator: CloudSimulator):
+    """Test integration works with simulated cloud and measure latency."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_USERNAME: MOCK_USERNAME, CONF_PASSWORD: MOCK_PASSWORD},
+        entry_id="simulator",
+    )
+    entry.add_to_hass(hass)
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    account = hass.data[DOMAIN][entry.entry_id][CONF_ACCOUNT_CONTROLLER]
+
+    # Email of account does not leak into IDs of diagnostic entities
+    metric_ids = [
+        x.entity_id
+        for x in er.async_entries_for_config_entry(er.async_get(hass), entry.entry_id)
+        if x.unique_id.endswith(METRIC_QUERY_LATENCY)
+    ]
+    assert len(metric_ids) == 1
+    assert "email" not in metric_ids[0]
+
+    tokens = {dev["deviceToken"] for dev in simulator.devices.values()}
+    await _async_wait_for(lambda: simulator.broker.subscriptions == tokens)
+    assert simulator.requests[:2] == ["loginByEmail", "deviceManager"]
+    assert simulator.requests.count("list") == SIM_DEVICES
+
+    # Initial state comes from HTTP polling
+    dev_id = next(iter(simulator.devices))
+    state = hass.states.get("sensor.device_1000_eco2")
+    assert state is not None
+    assert state.state == "400"
+
+    # Devices status frames are delivered
+    simulator.sensors[dev_id][1] = 1
+    seq = simulator.publish_values(dev_id)
+    await _async_wait_for(
+        lambda: hass.states.get("sensor.device_1000_eco2_raw").state == str(seq)
+    )
+    assert hass.states.get("binary_sensor.device_1000_air_quality_alert").state == (
+        STATE_ON
+    )
+
+    report = await async_measure_load(hass, simulator, SIM_RATE, SIM_DURATION)
+    print(f"\nSimulated {SIM_DEVICES} devices at {SIM_RATE} Hz: {report}")
+    assert report.frames > 0
+    assert report.updates > 0
+
+    manager = account._mqtt
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    assert account._mqtt is None
+    assert manager.topics == set()
+    await hass.async_block_till_done()
+
+
+async def test_hanging_device(hass: HomeAssistant, simulator: CloudSimulator):
+    """Test one hanging device does not make other devices unavailable."""
+    simulator.hanging.add(1001)
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_USERNAME: MOCK_USERNAME, CONF_PASSWORD: MOCK_PASSWORD},
+        entry_id="simulator",
+    )
+    entry.add_to_hass(hass)
+
+    # Hanging request is not waited for: it ends only with simulator
+    with patch("custom_components.jq300.api.QUERY_TIME_BUDGET", 0.2):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await _async_wait_for(lambda: hass.states.get("sensor.device_1002_eco2"))
+        data = hass.data[DOMAIN][entry.entry_id]
+        account = data[CONF_ACCOUNT_CONTROLLER]
+        coordinator = data[CONF_COORDINATOR]
+
+        assert coordinator.last_update_success is True
+        assert hass.states.get("sensor.device_1000_eco2").state == "400"
+        assert hass.states.get("sensor.device_1002_eco2").state == "400"
+        assert hass.states.get("sensor.device_1001_eco2").state == STATE_UNKNOWN
+
+        # Next poll cycle hangs on the same device again
+        account._sensors_polled = {}
+        await coordinator.async_refresh()
+        assert coordinator.last_update_success is True
+        assert hass.states.get("sensor.device_1000_eco2").state == "400"
+
+        # MQTT frames of other devices are still delivered
+        tokens = {dev["deviceToken"] for dev in simulator.devices.values()}
+        await _async_wait_for(lambda: simulator.broker.subscriptions == tokens)
+        seq = simulator.publish_values(1002)
+        await _async_wait_for(
+            lambda: hass.states.get("sensor.device_1002_eco2_raw").state == str(seq)
+        )
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_devices_discovery(hass: HomeAssistant, simulator: CloudSimulator):
+    """Test devices are added and removed without reload of entry."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_USERNAME: MOCK_USERNAME, CONF_PASSWORD: MOCK_PASSWORD},
+        entry_id="simulator",
+    )
+    entry.add_to_hass(hass)
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    account = hass.data[DOMAIN][entry.entry_id][CONF_ACCOUNT_CONTROLLER]
+    assert hass.states.get("sensor.device_1000_eco2") is not None
+
+    simulator.add_device(2000)
+    simulator.devices.pop(1000)
+    logins = simulator.requests.count("loginByEmail")
+
+    async_fire_time_changed(hass, dt_util.utcnow() + DISCOVERY_INTERVAL)
+    await hass.async_block_till_done()
+
+    tokens = {dev["deviceToken"] for dev in simulator.devices.values()}
+    await _async_wait_for(lambda: simulator.broker.subscriptions == tokens)
+    await _async_wait_for(lambda: hass.states.get("sensor.device_2000_eco2"))
+    assert hass.states.get("sensor.device_2000_eco2").state == "400"
+    assert hass.states.get("sensor.device_1000_eco2") is None
+    assert 1000 not in account.devices
+    assert simulator.requests.count("loginByEmail") == logins
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()